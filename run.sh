@@ -1,5 +1,5 @@
 #!/bin/bash
 echo ">>> 开始执行月度定投决策计算..."
-uv run -m src.strategy_a_share
-uv run -m src.strategy_hk_us
+# 单进程运行：只启动一次解释器，美债基准等行情只抓取一次
+uv run -m src.orchestrator "$@"
 echo ">>> 计算结束。"
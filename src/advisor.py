@@ -1,119 +1,157 @@
 import argparse
+import contextlib
 import sys
-from src.strategy_a_share import analyze as analyze_a
-from src.strategy_hk_us import analyze as analyze_hk
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from src.config import A_SHARE_CONFIG, ADVISOR_SPLIT, ADVISOR_TIMEOUTS, HK_SHARE_TARGETS, LEDGER_CONFIG
+from src import journal, market_data, net, profiling
+from src.routing import base_allocation, route
+from src.signals import strongest
+from src.strategy_a_share import analyze as analyze_a, observe_history as observe_a
+from src.strategy_hk_us import analyze as analyze_hk, observe_history as observe_hk
 
-def main():
-    parser = argparse.ArgumentParser(description="Investment Advisor based on SOP")
-    parser.add_argument("amount", type=float, help="Total available funds for this month (e.g. 20000)")
-    args = parser.parse_args()
-    
-    total_amount = args.amount
+@profiling.timed("advisor.gather_signals")
+def gather_signals(timeouts=None):
+    # 并发抓取：美债基准先行预热共享缓存，A股/港股各自等待同一份结果
+    timeouts = {**ADVISOR_TIMEOUTS, **(timeouts or {})}
+    sources = {
+        "benchmark": market_data.get_us_rate,
+        "a_share": analyze_a,
+        "hk_share": analyze_hk,
+    }
+    fallback = {
+        "benchmark": None,
+        "a_share": {"signal": "DATA_ERROR", "metrics": None},
+        "hk_share": {},
+    }
+
+    start = time.monotonic()
+    futures = {name: net.spawn(profiling.bind(fn)) for name, fn in sources.items()}
+
+    results, timed_out, errors = {}, [], {}
+    for name, fut in futures.items():
+        remaining = max(0.0, start + float(timeouts[name]) - time.monotonic())
+        try:
+            results[name] = fut.result(timeout=remaining)
+        except FutureTimeout:
+            timed_out.append(name)
+            results[name] = fallback[name]
+        except Exception as e:
+            errors[name] = e
+            results[name] = fallback[name]
+
+    return results, timed_out, errors, time.monotonic() - start
+
+def observe_history(results):
+    # 每次运行把 A股/港股利差各计入一次利差历史（与运行日志一样，只在入口调用）
+    observe_a(results["a_share"])
+    observe_hk(results["hk_share"])
+
+def holdings_report(res_a, res_hk, account=None) -> bool:
+    # 账本里有持仓时：按各标的的信号给出 SELL 的卖出数量，并按市场报告组合股息率
+    # （滚动 12 个月到手分红 / 当前市值；A股为人民币、港股为港币，分开统计）。没有持仓时返回 False
+    from src.ledger import Ledger, sell_size
+
+    holdings = Ledger().holdings(account)
+    if not holdings:
+        return False
+
+    results = {**res_hk, A_SHARE_CONFIG["CODE"]: res_a}
+    markets = {}
+    print(f"\n📒 当前持仓{f' ({account})' if account else ''}:")
+    for code, h in sorted(holdings.items()):
+        res = results.get(code) or {}
+        price = res["metrics"]["price"] if res.get("metrics") else None
+        market = "港股" if code.endswith(".HK") else "A股"
+        totals = markets.setdefault(market, {"value": 0.0, "income": 0.0, "cost": 0.0, "priced_income": 0.0})
+        totals["cost"] += h["cost"]
+        totals["income"] += h["ttm_income"]
+
+        line = f"   - {code}: {h['shares']:,.0f} 股"
+        if h["avg_cost"] is not None:
+            line += f" @ {h['avg_cost']:.3f}"
+        if price is not None and h["shares"] > 0:
+            value = h["shares"] * price
+            totals["value"] += value
+            totals["priced_income"] += h["ttm_income"]
+            line += f" | 现价 {price:.3f} | 市值 {value:,.2f} | 近12月分红 {h['ttm_income']:,.2f} ({h['ttm_income'] / value:.2%})"
+        else:
+            line += f" | 无报价 | 近12月分红 {h['ttm_income']:,.2f}"
+        print(line)
+
+        if res.get("signal") == "SELL" and h["shares"] > 0:
+            # 港股每手股数因标的而异，必须在 HK_SHARE_TARGETS 里配置 "lot"，否则给不出可成交的整手数量
+            lot = HK_SHARE_TARGETS.get(code, {}).get("lot")
+            if market == "港股" and lot is None:
+                print(f"     🔴 SELL: 未配置每手股数（HK_SHARE_TARGETS['{code}']['lot']），无法给出卖出数量")
+                continue
+            n = sell_size(h["shares"], lot=lot)
+            if n > 0:
+                amount = f"，约 {n * price:,.2f}" if price is not None else ""
+                print(f"     🔴 SELL: 建议卖出 {n:,.0f} 股（持仓的 {LEDGER_CONFIG['SELL_FRACTION']:.0%}，按整手取整{amount}）")
+            else:
+                print("     🔴 SELL: 持仓不足一手，暂不卖出")
+
+    for market, t in markets.items():
+        parts = [f"近12月分红 {t['income']:,.2f}"]
+        if t["value"] > 0:
+            parts.append(f"市值 {t['value']:,.2f} | 组合股息率 {t['priced_income'] / t['value']:.2%}")
+        if t["cost"] > 0:
+            parts.append(f"成本股息率 {t['income'] / t['cost']:.2%}")
+        print(f"   📊 {market}: " + " | ".join(parts))
+    return True
+
+def run(total_amount, account=None):
+    split = ADVISOR_SPLIT
     
     # 1. Base Allocation (2:4:3:1)
-    alloc = {
-        "growth": total_amount * 0.1,  # 10%
-        "defense": total_amount * 0.2, # 20%
-        "a_share": total_amount * 0.4, # 40%
-        "hk_share": total_amount * 0.3 # 30%
-    }
+    alloc = base_allocation(total_amount, split)
     
     print(f"\n💰 总资金: {total_amount:,.2f}")
     print("=" * 40)
     print(f"📊 基础配置 (2:4:3:1):")
-    print(f"   - 增长层 (10%): {alloc['growth']:,.2f}")
-    print(f"   - 防御层 (20%): {alloc['defense']:,.2f}")
-    print(f"   - A股红利 (40%): {alloc['a_share']:,.2f}")
-    print(f"   - 港股红利 (30%): {alloc['hk_share']:,.2f}")
+    print(f"   - 增长层 ({split['growth']:.0%}): {alloc['growth']:,.2f}")
+    print(f"   - 防御层 ({split['defense']:.0%}): {alloc['defense']:,.2f}")
+    print(f"   - A股红利 ({split['a_share']:.0%}): {alloc['a_share']:,.2f}")
+    print(f"   - 港股红利 ({split['hk_share']:.0%}): {alloc['hk_share']:,.2f}")
     print("=" * 40)
 
     # 2. Get Signals
     print("\n🔍 正在分析市场信号...")
-    try:
-        res_a = analyze_a()
-        res_hk = analyze_hk()
-    except Exception as e:
-        print(f"❌ 策略分析失败: {e}")
-        return
+    results, timed_out, errors, elapsed = gather_signals()
+    observe_history(results)
+    res_a = results["a_share"]
+    res_hk = results["hk_share"]
+
+    for name in timed_out:
+        print(f"   ⏱️ 数据源超时 ({ADVISOR_TIMEOUTS[name]}s): {name} -> 按 DATA_ERROR 处理")
+    for name, e in errors.items():
+        print(f"   ❌ 数据源失败: {name} -> {e}")
+    print(f"   (信号采集耗时 {elapsed:.2f}s)")
 
     sig_a = res_a.get("signal", "HOLD") # Default to HOLD if error
     
     # Aggregated HK Signal: Pick the 'strongest' signal (prioritize buying if any opportunity)
-    # Priority: STRONG_BUY > BUY > HOLD > STOP > SELL
-    hk_priority = ["STRONG_BUY", "BUY", "HOLD", "STOP", "SELL"]
-    sig_hk = "HOLD"
-    
-    # Simple logic: If any is STRONG_BUY, whole block is STRONG_BUY. 
-    # If all are STOP, block is STOP.
-    hk_signals = [v["signal"] for v in res_hk.values() if v["signal"] != "DATA_ERROR"]
-    
-    if not hk_signals:
-        sig_hk = "HOLD" # No data
-    elif "STRONG_BUY" in hk_signals:
-        sig_hk = "STRONG_BUY"
-    elif "BUY" in hk_signals:
-        sig_hk = "BUY"
-    elif "HOLD" in hk_signals:
-        sig_hk = "HOLD"
-    elif "STOP" in hk_signals:
-        sig_hk = "STOP"
-    else:
-        sig_hk = "SELL"
+    # Priority: STRONG_BUY > BUY > HOLD > STOP > SELL; no data -> HOLD
+    sig_hk = strongest(v["signal"] for v in res_hk.values())
 
     print(f"   - A股信号: {sig_a}")
     print(f"   - 港股信号: {sig_hk} (综合)")
     
     # 3. Dynamic Routing (SOP Logic)
-    final_plan = {
-        "buy_growth": alloc["growth"],
-        "buy_defense": alloc["defense"], # Base defense
-        "buy_a": alloc["a_share"],
-        "buy_hk": alloc["hk_share"]
-    }
-    
-    free_cash = 0
-    
-    # Process A-Share
-    if sig_a in ["STOP", "SELL"]:
-        print(f"   ⚠️ A股触发熔断/止盈 ({sig_a}) -> 预算转入防御层/自由资金")
-        free_cash += final_plan["buy_a"]
-        final_plan["buy_a"] = 0
-    elif sig_a == "STRONG_BUY":
-        # A-Share needs more money. Will check free cash later.
-        pass
-        
-    # Process HK-Share
-    if sig_hk in ["STOP", "SELL"]:
-        print(f"   ⚠️ 港股触发熔断/止盈 ({sig_hk}) -> 预算转入防御层/自由资金")
-        free_cash += final_plan["buy_hk"]
-        final_plan["buy_hk"] = 0
-    elif sig_hk == "STRONG_BUY":
-        pass
-
-    # Distribute Free Cash & Base Defense to STRONG BUY sectors
-    # Candidates for extra funding
-    candidates = []
-    if sig_a == "STRONG_BUY": candidates.append("buy_a")
-    if sig_hk == "STRONG_BUY": candidates.append("buy_hk")
-    
-    if candidates:
-        # We have opportunities! Mobilize the Defense layer AND any free cash from stopped sectors.
-        total_ammo = free_cash + final_plan["buy_defense"]
-        
-        # Zero out the defense buy because we are using it for offense
-        final_plan["buy_defense"] = 0 
-        
-        # Split ammo equally (or proportionally? Let's do equal split for simplicity as per SOP "All in")
-        ammo_per_sector = total_ammo / len(candidates)
-        
-        for sector in candidates:
-            final_plan[sector] += ammo_per_sector
-            print(f"   🚀 {sector} 触发吸血模式! 注入资金: {ammo_per_sector:,.2f}")
-    else:
-        # No strong buy opportunities. Free cash goes to Defense (SGOV)
-        if free_cash > 0:
-            final_plan["buy_defense"] += free_cash
-            print(f"   🛡️ 无绝佳机会，闲置预算转入防御层: {free_cash:,.2f}")
+    with profiling.stage("advisor.route"):
+        routed = route(total_amount, sig_a, sig_hk, split)
+    final_plan = routed["plan"]
+
+    labels = {"buy_a": ("A股", sig_a), "buy_hk": ("港股", sig_hk)}
+    for sector in routed["stopped"]:
+        label, sig = labels[sector]
+        print(f"   ⚠️ {label}触发熔断/止盈 ({sig}) -> 预算转入防御层/自由资金")
+    if routed["candidates"]:
+        for sector in routed["candidates"]:
+            print(f"   🚀 {sector} 触发吸血模式! 注入资金: {routed['ammo_per_sector']:,.2f}")
+    elif routed["free_cash"] > 0:
+        print(f"   🛡️ 无绝佳机会，闲置预算转入防御层: {routed['free_cash']:,.2f}")
 
     # 4. Final Report
     print("\n" + "=" * 40)
@@ -124,11 +162,71 @@ def main():
     print(f"4. [港股红利] 0939/0883 等:     {final_plan['buy_hk']:,.2f}")
     print("=" * 40)
     
-    # Extra advice for SELL
+    if timed_out:
+        print(f"⚠️ 本次方案存在超时数据源: {', '.join(timed_out)}（相关板块按观望处理）")
+
+    # 本次方案连同各标的信号写入运行日志
+    rows = [journal.row("a_share", A_SHARE_CONFIG["CODE"], res_a)]
+    rows += [journal.row("hk_share", code, r) for code, r in res_hk.items()]
+    rows.append({
+        "kind": "advisor",
+        "target": "plan",
+        "signal": None,
+        "spread": None,
+        "price": None,
+        "metrics": {"total_amount": total_amount, "sig_a": sig_a, "sig_hk": sig_hk, "alloc": alloc, "timed_out": timed_out},
+        "plan": final_plan,
+    })
+    journal.record("advisor", rows)
+
+    # Extra advice for SELL: sized from the ledger when there are holdings
+    if holdings_report(res_a, res_hk, account):
+        return
     if sig_a == "SELL":
         print("💡 提示: A股建议卖出部分持仓锁定利润。" )
     if sig_hk == "SELL":
         print("💡 提示: 港股建议卖出部分持仓锁定利润。" )
 
+def main():
+    parser = argparse.ArgumentParser(description="Investment Advisor based on SOP")
+    parser.add_argument("amount", type=float, nargs="?", help="Total available funds for this month (e.g. 20000)")
+    parser.add_argument("--accounts", default=None, help="Batch mode: CSV/JSON file of accounts (see src/advisor_batch.py)")
+    parser.add_argument("--out", default=None, help="Batch mode: output file (.csv or .json; default CSV to stdout)")
+    parser.add_argument("--account", default=None, help="Ledger account for SELL sizing and yield (default: all accounts)")
+    parser.add_argument("--stress", type=int, default=None, metavar="N", help="Monte Carlo stress mode: route N simulated markets")
+    parser.add_argument("--seed", type=int, default=None, help="Stress mode: random seed for reproducible scenarios")
+    parser.add_argument("--calibrate", action="store_true", help="Stress mode: estimate volatilities from the local history store")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    if (args.amount is None) == (args.accounts is None):
+        parser.error("give either an amount or --accounts")
+    if args.stress is not None and args.amount is None:
+        parser.error("--stress needs an amount")
+    if args.stress is not None and args.stress < 1:
+        parser.error("--stress must be at least 1")
+
+    if args.accounts:
+        from src.advisor_batch import run as run_batch
+
+        # 批量模式的 stdout 只留给 CSV：--profile 的阶段耗时也写到 stderr
+        csv_out = sys.stdout
+        try:
+            with contextlib.redirect_stdout(sys.stderr), profiling.session(args, "advisor"):
+                run_batch(args.accounts, args.out, csv_out)
+        except (ValueError, OSError) as e:
+            # 账户文件缺失/格式错误、金额非法等输入问题按参数错误报告，不输出 traceback
+            parser.error(str(e))
+        return
+
+    with profiling.session(args, "advisor"):
+        if args.stress is not None:
+            from src.stress import run as run_stress
+
+            summary = run_stress(args.amount, args.stress, args.seed, args.calibrate)
+        else:
+            run(args.amount, args.account)
+    if args.stress is not None and summary is None:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
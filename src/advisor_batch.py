@@ -0,0 +1,159 @@
+# 多账户批量方案：市场信号只采集一次，所有账户用 route_arrays 一次性向量化路由。
+# 账户文件（CSV 或 JSON 列表）每行/每项一个账户，字段：
+# - account: 账户名（必填）；amount: 本月资金（必填）
+# - growth / defense / a_share / hk_share: 自定义配置比例（可选，缺省取 ADVISOR_SPLIT，合计须为 1）
+# - sig_a / sig_hk: 按账户覆盖板块信号（可选，如某账户不做港股可填 STOP）
+# JSON 里的配置比例也可以写成嵌套的 "split": {...}。输出按 --out 的扩展名写 CSV 或 JSON。
+import contextlib
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+
+from src.config import A_SHARE_CONFIG, ADVISOR_SPLIT
+from src.routing import BUCKETS, route_arrays
+from src.signals import SIGNAL_CODES, SIGNALS
+
+SPLIT_KEYS = ("growth", "defense", "a_share", "hk_share")
+OUTPUT_FIELDS = ("account", "amount", "sig_a", "sig_hk", *BUCKETS)
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", file=sys.stderr)
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def load_accounts(path: str) -> list[dict]:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        for row in rows:
+            row.update(row.pop("split", None) or {})
+        return rows
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def to_columns(accounts: list[dict]) -> dict:
+    # 校验并转成列：amount / 各配置比例为 float 列表，信号覆盖为 None 或信号名
+    cols = {"account": [], "amount": [], "sig_a": [], "sig_hk": [], **{k: [] for k in SPLIT_KEYS}}
+    for i, row in enumerate(accounts, 1):
+        name = row.get("account")
+        if _blank(name) or _blank(row.get("amount")):
+            raise ValueError(f"第 {i} 个账户缺少 account 或 amount")
+        split = {k: float(ADVISOR_SPLIT[k] if _blank(row.get(k)) else row[k]) for k in SPLIT_KEYS}
+        if abs(sum(split.values()) - 1) > 1e-6:
+            raise ValueError(f"账户 {name} 的配置比例合计为 {sum(split.values()):.4f}，应为 1")
+        for key in ("sig_a", "sig_hk"):
+            sig = None if _blank(row.get(key)) else str(row[key]).strip().upper()
+            if sig is not None and sig not in SIGNAL_CODES:
+                raise ValueError(f"账户 {name} 的 {key} 无效: {row[key]}（可选 {', '.join(SIGNALS)}）")
+            cols[key].append(sig)
+
+        cols["account"].append(str(name))
+        cols["amount"].append(float(row["amount"]))
+        for k in SPLIT_KEYS:
+            cols[k].append(split[k])
+    return cols
+
+
+def plan_accounts(cols: dict, sig_a: str, sig_hk: str) -> dict:
+    # 市场信号 + 账户覆盖 -> 信号编码数组，一次 route_arrays 得到全部账户的方案
+    import numpy as np
+
+    codes = {}
+    for key, market in (("sig_a", sig_a), ("sig_hk", sig_hk)):
+        names = [market if s is None else s for s in cols[key]]
+        codes[key] = np.fromiter((SIGNAL_CODES[s] for s in names), dtype=np.int8, count=len(names))
+        cols[key] = names
+
+    split = {k: np.asarray(cols[k], dtype="float64") for k in SPLIT_KEYS}
+    plan = route_arrays(np.asarray(cols["amount"], dtype="float64"), codes["sig_a"], codes["sig_hk"], split)
+    return {**cols, **plan}
+
+
+def write_plans(plans: dict, path: str | None, stdout=None):
+    n = len(plans["account"])
+    rows = (
+        {
+            key: round(float(plans[key][i]), 2) if key in BUCKETS or key == "amount" else plans[key][i]
+            for key in OUTPUT_FIELDS
+        }
+        for i in range(n)
+    )
+    if path and path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(rows), f, ensure_ascii=False, indent=2)
+        return
+
+    f = open(path, "w", newline="", encoding="utf-8") if path else (stdout or sys.stdout)
+    try:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if path:
+            f.close()
+
+
+def record(results: dict, plans: dict):
+    # 写入运行日志：市场信号各一行，每个账户的方案一行（target 为 plan:<账户名>）
+    from src import journal
+
+    rows = [journal.row("a_share", A_SHARE_CONFIG["CODE"], results["a_share"])]
+    rows += [journal.row("hk_share", code, r) for code, r in results["hk_share"].items()]
+    for i, account in enumerate(plans["account"]):
+        rows.append({
+            "kind": "advisor",
+            "target": f"plan:{account}",
+            "signal": None,
+            "spread": None,
+            "price": None,
+            "metrics": {
+                "total_amount": float(plans["amount"][i]),
+                "sig_a": plans["sig_a"][i],
+                "sig_hk": plans["sig_hk"][i],
+                "split": {k: float(plans[k][i]) for k in SPLIT_KEYS},
+            },
+            "plan": {bucket: float(plans[bucket][i]) for bucket in BUCKETS},
+        })
+    journal.record("advisor_batch", rows)
+
+
+def run(accounts_path: str, out_path: str | None = None, stdout=None):
+    # 不带 --out 时 stdout 只有 CSV，方便重定向：本模块日志写 stderr，
+    # 信号采集与运行日志期间各模块 log() 打到 stdout 的提示也一并转到 stderr
+    stdout = stdout or sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        return _run(accounts_path, out_path, stdout)
+
+
+def _run(accounts_path: str, out_path: str | None, stdout) -> dict:
+    from src.advisor import gather_signals, observe_history
+    from src.signals import strongest
+
+    cols = to_columns(load_accounts(accounts_path))
+    log(f"账户数: {len(cols['account']):,}")
+
+    results, timed_out, errors, elapsed = gather_signals()
+    observe_history(results)
+    for name in timed_out:
+        log(f"⏱️ 数据源超时: {name} -> 按 DATA_ERROR 处理")
+    for name, e in errors.items():
+        log(f"❌ 数据源失败: {name} -> {e}")
+    sig_a = results["a_share"].get("signal", "HOLD")
+    sig_hk = strongest(v["signal"] for v in results["hk_share"].values())
+    # A股 DATA_ERROR 与单账户模式一致，按观望处理
+    sig_a = sig_a if sig_a in SIGNAL_CODES else "HOLD"
+    log(f"市场信号: A股 {sig_a} | 港股 {sig_hk} (综合) | 信号采集耗时 {elapsed:.2f}s")
+
+    t0 = time.perf_counter()
+    plans = plan_accounts(cols, sig_a, sig_hk)
+    write_plans(plans, out_path, stdout)
+    record(results, plans)
+    log(f"路由 + 输出耗时 {(time.perf_counter() - t0) * 1000:.1f} ms" + (f" -> {out_path}" if out_path else ""))
+    return plans
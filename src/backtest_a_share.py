@@ -0,0 +1,207 @@
+# A股利差策略的历史回测（向量化）。
+# 按 strategy_a_share.analyze 的信号逻辑，用 NumPy 数组一次性回放多年的日线价格、分红和 ^IRX，
+# 不逐日调用 analyze()，10 年日线单标的回测为毫秒级，可直接放进参数优化循环。
+#
+# 回测规则（与综合方案的月度节奏一致）：
+# - 每月第一个交易日做一次决策；STRONG_BUY 按 dip_multiplier 倍预算买入，BUY/HOLD 按预算买入，
+#   STOP 不买，SELL 不买并卖出 sell_fraction 比例的持仓。
+# - 分红按权益登记日（遇非交易日顺延）的持仓计入现金流，可按 tax_rate 扣税。
+import argparse
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from src import profiling
+from src.config import A_SHARE_CONFIG, BENCHMARK_TICKER
+from src.signals import BUY, HOLD, SELL, SIGNALS, STRONG_BUY, classify_array
+from src.ttm_dividend import TTMDividendSeries
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def align_asof(dates, src_dates, src_values) -> np.ndarray:
+    # 把低频/缺失的序列（如 ^IRX）按“最近一个已知值”对齐到交易日
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    src_dates = np.asarray(src_dates, dtype="datetime64[D]")
+    src_values = np.asarray(src_values, dtype="float64")
+    idx = np.searchsorted(src_dates, dates, side="right") - 1
+    out = src_values[np.clip(idx, 0, None)]
+    out[idx < 0] = np.nan
+    return out
+
+
+def month_starts(dates) -> np.ndarray:
+    months = np.asarray(dates, dtype="datetime64[D]").astype("datetime64[M]")
+    first = np.ones(len(months), dtype=bool)
+    first[1:] = months[1:] != months[:-1]
+    return first
+
+
+@profiling.timed("backtest.run_backtest")
+def run_backtest(
+    dates,
+    prices,
+    div_dates,
+    div_amounts,
+    rates,
+    thresholds: dict | None = None,
+    monthly_amount: float = 8000.0,
+    dip_multiplier: float = 2.0,
+    sell_fraction: float = 0.1,
+    tax_rate: float = 0.0,
+) -> dict:
+    if not 0.0 <= sell_fraction <= 1.0:
+        raise ValueError(f"sell_fraction 需在 [0, 1] 内: {sell_fraction}")
+    thresholds = A_SHARE_CONFIG["THRESHOLDS"] if thresholds is None else thresholds
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    prices = np.asarray(prices, dtype="float64")
+    rates = np.asarray(rates, dtype="float64")
+    div_dates = np.asarray(div_dates, dtype="datetime64[D]")
+    div_amounts = np.asarray(div_amounts, dtype="float64")
+    n = len(dates)
+
+    ttm = TTMDividendSeries(div_dates, div_amounts).ttm_at(dates)
+    etf_yield = ttm / prices * 100
+    spread = etf_yield - rates
+    signal = classify_array(spread, thresholds)
+
+    # 只有每月首个交易日、且基准利率可用时才做决策
+    decide = month_starts(dates) & ~np.isnan(rates)
+    weight = np.zeros(len(SIGNALS))
+    weight[[HOLD, BUY]] = 1.0
+    weight[STRONG_BUY] = dip_multiplier
+    buy_amount = np.where(decide, monthly_amount * weight[signal], 0.0)
+    sell_day = decide & (signal == SELL)
+
+    # 持仓递推 H_t = H_{t-1} * k_t + b_t，k_t 为卖出保留比例（卖出日为 1 - sell_fraction，其余为 1）。
+    # 两次卖出之间只有买入：H_t = 最近一个卖出日的持仓 + 之后的累计买入。
+    # 卖出日（最多每月一次）逐个递推，其余日子按区段向量化；全部卖出（k = 0）或多次卖出也不会下溢。
+    bought_shares = buy_amount / prices
+    bought_total = np.cumsum(bought_shares)
+    sells = np.flatnonzero(sell_day)
+    anchor = np.zeros(len(sells) + 1)  # anchor[j + 1] = 第 j 个卖出日的持仓
+    anchor_total = np.zeros(len(sells) + 1)
+    for j, day in enumerate(sells):
+        before = anchor[j] + bought_total[day] - bought_shares[day] - anchor_total[j]
+        anchor[j + 1] = (1.0 - sell_fraction) * before + bought_shares[day]
+        anchor_total[j + 1] = bought_total[day]
+    segment = np.searchsorted(sells, np.arange(n), side="right")
+    position = anchor[segment] + bought_total - anchor_total[segment]
+
+    prev_position = np.concatenate(([0.0], position[:-1]))
+    sold_shares = np.where(sell_day, prev_position - position, 0.0)
+    sell_proceeds = sold_shares * prices
+
+    # 分红事件映射到当日或之后的第一个交易日
+    div_per_share = np.zeros(n)
+    idx = np.searchsorted(dates, div_dates, side="left")
+    ok = idx < n
+    np.add.at(div_per_share, idx[ok], div_amounts[ok])
+    div_cash = position * div_per_share * (1.0 - tax_rate)
+
+    # 现金流：买入为负，卖出与分红为正
+    cash_flow = sell_proceeds + div_cash - buy_amount
+    value = position * prices
+    invested = np.cumsum(buy_amount)
+    received = np.cumsum(sell_proceeds + div_cash)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_return = np.where(invested > 0, (value + received) / invested - 1.0, np.nan)
+
+    return {
+        "dates": dates,
+        "price": prices,
+        "ttm_div": ttm,
+        "etf_yield": etf_yield,
+        "us_rate": rates,
+        "spread": spread,
+        "signal": signal,
+        "decision": decide,
+        "position": position,
+        "buy_amount": buy_amount,
+        "sell_proceeds": sell_proceeds,
+        "dividend_cash": div_cash,
+        "cash_flow": cash_flow,
+        "value": value,
+        "invested": invested,
+        "total_return": total_return,
+    }
+
+
+def summarize(result: dict) -> dict:
+    decisions = result["signal"][result["decision"]]
+    invested = float(result["invested"][-1]) if len(result["invested"]) else 0.0
+    return {
+        "start": str(result["dates"][0]),
+        "end": str(result["dates"][-1]),
+        "days": int(len(result["dates"])),
+        "decisions": int(len(decisions)),
+        "signal_counts": {name: int((decisions == i).sum()) for i, name in enumerate(SIGNALS)},
+        "invested": invested,
+        "final_value": float(result["value"][-1]),
+        "dividends": float(result["dividend_cash"].sum()),
+        "sell_proceeds": float(result["sell_proceeds"].sum()),
+        "total_return": float(result["total_return"][-1]),
+    }
+
+
+def fraction(text: str) -> float:
+    # argparse 类型：0~1 之间的比例
+    value = float(text)
+    if not 0.0 <= value <= 1.0:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 1, got {text}")
+    return value
+
+
+@profiling.timed("backtest.load_history")
+def load_history(code: str, start: str, end: str, offline: bool = False):
+    # 从本地历史库读取（非离线模式下先增量更新）
+    from src import history_store
+
+    dates, closes = history_store.get_series("price", code, start, end, offline=offline)
+    div_dates, div_amounts = history_store.get_series("dividend", code, offline=offline)
+    bench_dates, bench = history_store.get_series("price", BENCHMARK_TICKER, offline=offline)
+    rates = align_asof(dates, bench_dates, bench)
+    return dates, np.asarray(closes, dtype="float64"), div_dates, div_amounts, rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized backtest of the A-share spread strategy")
+    parser.add_argument("--code", default=A_SHARE_CONFIG["CODE"], help="ETF code")
+    parser.add_argument("--start", default="2015-01-01", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="End date (YYYY-MM-DD)")
+    parser.add_argument("--amount", type=float, default=8000.0, help="Monthly budget")
+    parser.add_argument("--dip-multiplier", type=float, default=2.0, help="Budget multiplier on STRONG_BUY")
+    parser.add_argument("--sell-fraction", type=fraction, default=0.1, help="Fraction of position sold on SELL")
+    parser.add_argument("--offline", action="store_true", help="Use the local history store only")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "backtest_a_share"):
+        print(f"\n=== A股利差策略回测: {args.code} ({args.start} ~ {args.end}) ===")
+        try:
+            history = load_history(args.code, args.start, args.end, args.offline)
+        except Exception as e:
+            log(f"历史数据获取失败: {e}")
+            return
+
+        t0 = time.perf_counter()
+        result = run_backtest(
+            *history,
+            monthly_amount=args.amount,
+            dip_multiplier=args.dip_multiplier,
+            sell_fraction=args.sell_fraction,
+        )
+        elapsed = time.perf_counter() - t0
+        s = summarize(result)
+
+        print(f"交易日: {s['days']} | 决策次数: {s['decisions']} | 回测耗时: {elapsed * 1000:.2f} ms")
+        print("信号分布: " + " | ".join(f"{k}: {v}" for k, v in s["signal_counts"].items()))
+        print(f"累计投入: {s['invested']:,.2f} | 期末市值: {s['final_value']:,.2f}")
+        print(f"累计分红: {s['dividends']:,.2f} | 止盈回笼: {s['sell_proceeds']:,.2f}")
+        print(f"总收益率: {s['total_return']:+.2%}")
+
+
+if __name__ == "__main__":
+    main()
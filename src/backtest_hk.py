@@ -0,0 +1,202 @@
+# 港股红利策略的逐标的历史回测（多进程）。
+# 每个标的用本地历史库里的真实日线与分红事件回放 HK_THRESHOLDS 的信号，复用 backtest_a_share.run_backtest：
+# - 分红先扣预扣税（默认与 strategy_hk_us 一致的 10%），再按登记日汇率换成美元；信号用税后股息率判断
+# - 价格按当日汇率换成美元，月度预算、市值、分红现金流都以美元计，与美元计价的 ^IRX 基准同口径
+# - 同时回放一遍“每月固定定投”作为对照，看阈值择时相对无脑定投的超额
+# 标的之间相互独立，按标的分发到进程池；子进程只读本地历史库（内存映射），不联网。
+# 用法:
+#   uv run -m src.backtest_hk                               # HK_SHARE_TARGETS，先增量更新历史库
+#   uv run -m src.backtest_hk 0939.HK 0883.HK --start 2010-01-01 --offline --workers 8
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+
+from src import profiling
+from src.backtest_a_share import align_asof, fraction, load_history, run_backtest, summarize
+from src.config import BENCHMARK_TICKER, HK_BACKTEST_CONFIG, HK_SHARE_TARGETS, HK_THRESHOLDS
+from src.signals import SIGNALS
+from src.strategy_hk_us import DIVIDEND_TAX
+
+# 对照组：所有边界放到 ±inf，任何利差都落在 BUY 档，即每月固定定投、从不停买/止盈
+DCA_THRESHOLDS = {"TAKE_PROFIT": -np.inf, "STOP_BUY": -np.inf, "NORMAL_BUY": -np.inf, "BUY_DIP": np.inf}
+# 联网增量更新历史库时的并发线程数（I/O 为主）
+UPDATE_THREADS = 8
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def usd_per_hkd(dates) -> tuple[np.ndarray, str]:
+    # 对齐到给定日期的 美元/港元 汇率；历史库没有汇率（或早于汇率数据）的日期按联系汇率 FX_FALLBACK 折算
+    from src import history_store
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    fallback = 1.0 / HK_BACKTEST_CONFIG["FX_FALLBACK"]
+    try:
+        fx_dates, fx = history_store.get_series("price", HK_BACKTEST_CONFIG["FX_TICKER"], offline=True)
+    except RuntimeError:
+        return np.full(len(dates), fallback), f"peg {HK_BACKTEST_CONFIG['FX_FALLBACK']:.2f}"
+    rate = align_asof(dates, fx_dates, 1.0 / np.asarray(fx, dtype="float64"))
+    missing = np.isnan(rate)
+    source = HK_BACKTEST_CONFIG["FX_TICKER"]
+    if missing.any():
+        source += f" (+peg {int(missing.sum())} 天)"
+    return np.where(missing, fallback, rate), source
+
+
+def backtest_ticker(job: tuple) -> dict:
+    # 子进程入口：job = (code, start, end, params)；失败时返回 {"code", "error"}，不让单个标的拖垮整批
+    code, start, end, params = job
+    t0 = time.perf_counter()
+    try:
+        dates, prices, div_dates, div_amounts, rates = load_history(code, start, end, offline=True)
+    except RuntimeError as e:
+        return {"code": code, "error": str(e)}
+    if len(dates) < 2:
+        return {"code": code, "error": "区间内没有价格数据"}
+
+    fx_daily, fx_source = usd_per_hkd(dates)
+    fx_div, _ = usd_per_hkd(div_dates)
+    prices_usd = np.asarray(prices, dtype="float64") * fx_daily
+    net_div_usd = np.asarray(div_amounts, dtype="float64") * (1 - params["tax_rate"]) * fx_div
+
+    common = dict(
+        monthly_amount=params["monthly_amount"],
+        dip_multiplier=params["dip_multiplier"],
+        sell_fraction=params["sell_fraction"],
+    )
+    strategy = summarize(run_backtest(dates, prices_usd, div_dates, net_div_usd, rates, HK_THRESHOLDS, **common))
+    dca = summarize(run_backtest(dates, prices_usd, div_dates, net_div_usd, rates, DCA_THRESHOLDS, **common))
+    return {
+        "code": code,
+        "strategy": strategy,
+        "dca": dca,
+        "fx": fx_source,
+        "elapsed": time.perf_counter() - t0,
+    }
+
+
+def pool_results(results: list[dict]) -> dict:
+    # 合并全部有效标的：金额直接相加，收益率按合并后的现金流重新计算
+    ok = [r for r in results if "error" not in r]
+    pooled = {}
+    for key in ("strategy", "dca"):
+        invested = sum(r[key]["invested"] for r in ok)
+        value = sum(r[key]["final_value"] for r in ok)
+        dividends = sum(r[key]["dividends"] for r in ok)
+        sells = sum(r[key]["sell_proceeds"] for r in ok)
+        pooled[key] = {
+            "invested": invested,
+            "final_value": value,
+            "dividends": dividends,
+            "sell_proceeds": sells,
+            "total_return": (value + dividends + sells) / invested - 1 if invested > 0 else float("nan"),
+        }
+    pooled["signal_counts"] = {
+        name: sum(r["strategy"]["signal_counts"][name] for r in ok) for name in SIGNALS
+    }
+    pooled["tickers"] = len(ok)
+    return pooled
+
+
+def update_history(codes: list[str]):
+    # 子进程只读本地数据，联网更新放在主进程里并发完成
+    from src import history_store
+
+    jobs = [("price", c) for c in codes] + [("dividend", c) for c in codes]
+    jobs += [("price", BENCHMARK_TICKER), ("price", HK_BACKTEST_CONFIG["FX_TICKER"])]
+
+    def one(job):
+        try:
+            history_store.update(*job)
+        except Exception as e:
+            log(f"{job[0]}/{job[1]} 增量更新失败，使用本地数据: {e}")
+
+    with ThreadPoolExecutor(max_workers=UPDATE_THREADS) as pool:
+        list(pool.map(profiling.bind(one), jobs))
+
+
+@profiling.timed("backtest_hk.run")
+def run(codes: list[str], start: str, end: str, params: dict, workers: int) -> list[dict]:
+    jobs = [(code, start, end, params) for code in codes]
+    if workers <= 1 or len(jobs) == 1:
+        return [backtest_ticker(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(backtest_ticker, jobs, chunksize=chunksize))
+
+
+def report(results: list[dict], pooled: dict):
+    header = f"{'code':<10}{'name':<12}{'days':>6}{'SB/B/H/ST/SE':>18}{'invested $':>13}{'value $':>13}{'div $':>11}{'return':>9}{'DCA':>9}{'excess':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        name = HK_SHARE_TARGETS.get(r["code"], {}).get("name", "")
+        if "error" in r:
+            print(f"{r['code']:<10}{name:<12}  跳过: {r['error']}")
+            continue
+        s, d = r["strategy"], r["dca"]
+        counts = "/".join(str(s["signal_counts"][k]) for k in reversed(SIGNALS))
+        print(
+            f"{r['code']:<10}{name:<12}{s['days']:>6}{counts:>18}{s['invested']:>13,.0f}{s['final_value']:>13,.0f}"
+            f"{s['dividends']:>11,.0f}{s['total_return']:>+9.1%}{d['total_return']:>+9.1%}"
+            f"{s['total_return'] - d['total_return']:>+9.1%}"
+        )
+
+    if pooled["tickers"]:
+        s, d = pooled["strategy"], pooled["dca"]
+        counts = "/".join(str(pooled["signal_counts"][k]) for k in reversed(SIGNALS))
+        print("-" * len(header))
+        print(
+            f"{'合计':<10}{pooled['tickers']:<12}{'':>6}{counts:>18}{s['invested']:>13,.0f}{s['final_value']:>13,.0f}"
+            f"{s['dividends']:>11,.0f}{s['total_return']:>+9.1%}{d['total_return']:>+9.1%}"
+            f"{s['total_return'] - d['total_return']:>+9.1%}"
+        )
+    fx = sorted({r["fx"] for r in results if "fx" in r})
+    if fx:
+        print(f"汇率: {', '.join(fx)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-ticker HK dividend backtest with withholding tax and HKD/USD conversion")
+    parser.add_argument("codes", nargs="*", help="HK tickers (default: HK_SHARE_TARGETS)")
+    parser.add_argument("--start", default="2010-01-01", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="End date (YYYY-MM-DD)")
+    parser.add_argument("--amount", type=float, default=1000.0, help="Monthly budget per ticker (USD)")
+    parser.add_argument("--dip-multiplier", type=float, default=2.0, help="Budget multiplier on STRONG_BUY")
+    parser.add_argument("--sell-fraction", type=fraction, default=0.1, help="Fraction of position sold on SELL")
+    parser.add_argument("--tax", type=fraction, default=DIVIDEND_TAX, help="Dividend withholding tax rate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--offline", action="store_true", help="Use the local history store only")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    codes = list(dict.fromkeys(args.codes or HK_SHARE_TARGETS))
+    params = {
+        "monthly_amount": args.amount,
+        "dip_multiplier": args.dip_multiplier,
+        "sell_fraction": args.sell_fraction,
+        "tax_rate": args.tax,
+    }
+    with profiling.session(args, "backtest_hk"):
+        print(f"\n=== 港股红利回测: {len(codes)} 个标的 ({args.start} ~ {args.end}) | 税率 {args.tax:.0%} | {args.workers} 进程 ===")
+        if not args.offline:
+            update_history(codes)
+
+        t0 = time.perf_counter()
+        results = run(codes, args.start, args.end, params, args.workers)
+        elapsed = time.perf_counter() - t0
+        pooled = pool_results(results)
+
+        report(results, pooled)
+        cpu = sum(r.get("elapsed", 0.0) for r in results)
+        print(f"回测耗时: {elapsed:.2f}s（各标的计算合计 {cpu:.2f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# 端到端性能基准（完全离线）：用合成数据源（SyntheticProvider）替换 akshare / yfinance，
+# 在 4 ~ 10,000 个标的、1 天 ~ 20 年历史的合成数据上计时各策略的 analyze、advisor 的信号采集 + 路由和向量化回测，
+# 输出延迟分位数、吞吐（标的或交易日 / 秒）和 tracemalloc 峰值内存，并可与保存的基线对比、发现回归。
+# 用法:
+#   uv run -m src.benchmark --save-baseline bench.json
+#   uv run -m src.benchmark --baseline bench.json        # p50 变慢超过 --tolerance 倍时退出码为 1
+import argparse
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime
+from unittest import mock
+
+import numpy as np
+
+from src import providers
+
+UNIVERSE_SIZES = (4, 100, 1_000, 10_000)
+HISTORY_DAYS = (1, 21, 252, 1_260, 5_040)  # 1 天 / 1 月 / 1 年 / 5 年 / 20 年（交易日）
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def _unit(code: str) -> float:
+    # 按代码生成确定的 [0, 1) 伪随机数：同一标的每次运行的报价都一样
+    return zlib.crc32(code.encode("utf-8")) / 2**32
+
+
+class SyntheticProvider:
+    # 实现 providers.METHODS 中策略用到的接口；数据在构造时生成，计时只包含策略侧的处理
+    name = "synthetic"
+    cacheable = False
+
+    def __init__(self, history_days: int = 252, etf_count: int = 1_000):
+        import pandas as pd
+
+        from src.config import A_SHARE_CONFIG
+
+        self.rate = 4.2
+        codes = [A_SHARE_CONFIG["CODE"]] + [f"5{i:05d}" for i in range(etf_count - 1)]
+        self.etf_table = pd.DataFrame(
+            {
+                "code": codes,
+                "name": [f"ETF{c}" for c in codes],
+                "price": [0.8 + _unit(c) for c in codes],
+                "turnover": [1e8 * (1 + _unit(c)) for c in codes],
+            }
+        )
+        # 每月一次分红，覆盖最近 history_days 个交易日（至少一条）
+        months = max(1, history_days // 21)
+        days = pd.bdate_range(end=date.today(), periods=max(1, history_days))
+        self.dividends = pd.DataFrame({"date": days[:: max(1, len(days) // months)][:months], "amount": 0.005})
+
+    def us_rate(self) -> float:
+        return self.rate
+
+    def spot_table(self, kind: str):
+        return self.etf_table
+
+    def dividend_events(self, symbol: str):
+        return self.dividends
+
+    def hk_closes(self, codes: list[str]) -> dict[str, float]:
+        return {code: 5.0 + 50.0 * _unit(code) for code in codes}
+
+    def hk_price(self, code: str) -> float:
+        return 5.0 + 50.0 * _unit(code)
+
+
+def hk_universe(n: int) -> dict:
+    return {
+        f"{i:04d}.HK": {"name": f"HK{i:04d}", "manual_div": 0.2 + 3.0 * _unit(f"{i}.div"), "MANUAL_PRICE": None}
+        for i in range(n)
+    }
+
+
+def dividend_universe(n: int) -> dict:
+    return {
+        f"6{i:05d}": {
+            "name": f"A{i:05d}",
+            "kind": "stock",
+            "MANUAL_PRICE": 2.0 + 20.0 * _unit(f"6{i:05d}"),
+            "MANUAL_TTM_DIV": 0.1 + 1.0 * _unit(f"6{i:05d}.div"),
+        }
+        for i in range(n)
+    }
+
+
+def backtest_inputs(days: int):
+    rng = np.random.default_rng(days)
+    dates = np.busday_offset(np.datetime64(date.today(), "D"), np.arange(-days + 1, 1), roll="backward")
+    prices = 1.0 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    div_dates = dates[::63]
+    div_amounts = np.full(len(div_dates), 0.015)
+    rates = 4.0 + np.cumsum(rng.normal(0, 0.02, days))
+    return dates, prices, div_dates, div_amounts, rates
+
+
+@contextmanager
+def offline(provider, hk_targets=None, dividend_targets=None, manual_a_share=False):
+    # 切到合成数据源，并临时替换各模块引用的 config 对象；退出时全部还原
+    from src import market_data, strategy_a_share_dividend_targets, strategy_hk_us, ttm_dividend
+    from src.config import A_SHARE_CONFIG, HISTORY_CONFIG, JOURNAL_CONFIG, SPREAD_STATS_CONFIG
+
+    previous = providers.use(provider)
+    a_share_manual = {"MANUAL_PRICE": None, "MANUAL_TTM_DIV": None, "MANUAL_INDEX_YIELD": None}
+    if manual_a_share:
+        a_share_manual.update(MANUAL_PRICE=1.2, MANUAL_TTM_DIV=0.06)
+    try:
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(market_data, "MANUAL_US_RATE", None))
+            stack.enter_context(mock.patch.dict(A_SHARE_CONFIG, a_share_manual))
+            # 合成数据不计入真实的利差历史和运行日志
+            stack.enter_context(mock.patch.dict(SPREAD_STATS_CONFIG, {"ENABLED": False}))
+            stack.enter_context(mock.patch.dict(JOURNAL_CONFIG, {"ENABLED": False}))
+            # 分红事件写入临时的历史库，TTM 序列缓存也从空开始（首次调用在预热里完成增量更新）
+            stack.enter_context(mock.patch.dict(HISTORY_CONFIG, {"DIR": stack.enter_context(tempfile.TemporaryDirectory())}))
+            stack.enter_context(mock.patch.object(ttm_dividend, "_SERIES", {}))
+            stack.enter_context(mock.patch.object(ttm_dividend, "_REFRESHED", {}))
+            if hk_targets is not None:
+                stack.enter_context(mock.patch.object(strategy_hk_us, "HK_SHARE_TARGETS", hk_targets))
+            if dividend_targets is not None:
+                stack.enter_context(
+                    mock.patch.object(strategy_a_share_dividend_targets, "A_SHARE_DIVIDEND_TARGETS", dividend_targets)
+                )
+            yield
+    finally:
+        providers.use(previous)
+
+
+def _advisor_round():
+    from src.advisor import gather_signals
+    from src.config import ADVISOR_SPLIT
+    from src.routing import route
+    from src.signals import strongest
+
+    results, _, _, _ = gather_signals()
+    sig_hk = strongest(v["signal"] for v in results["hk_share"].values())
+    return route(20000.0, results["a_share"].get("signal", "HOLD"), sig_hk, ADVISOR_SPLIT)
+
+
+def cases() -> dict:
+    # name -> (规模轴, 规模单位, setup(size) -> (上下文, 被测函数))
+    from src import strategy_a_share, strategy_a_share_dividend_targets, strategy_core_dca, strategy_hk_us
+    from src.backtest_a_share import run_backtest
+
+    def a_share(days):
+        return offline(SyntheticProvider(history_days=days)), strategy_a_share.analyze
+
+    def hk_share(n):
+        return offline(SyntheticProvider(), hk_targets=hk_universe(n)), strategy_hk_us.analyze
+
+    def dividend_targets(n):
+        return offline(SyntheticProvider(), dividend_targets=dividend_universe(n)), strategy_a_share_dividend_targets.analyze
+
+    def core_dca(n):
+        return offline(SyntheticProvider(), manual_a_share=True), lambda: strategy_core_dca.analyze(20000.0)
+
+    def advisor(n):
+        return offline(SyntheticProvider(), hk_targets=hk_universe(n)), _advisor_round
+
+    def backtest(days):
+        inputs = backtest_inputs(days)
+        return offline(SyntheticProvider()), lambda: run_backtest(*inputs)
+
+    return {
+        "a_share.analyze": (HISTORY_DAYS, "days", a_share),
+        "hk_share.analyze": (UNIVERSE_SIZES, "targets", hk_share),
+        "dividend_targets.analyze": (UNIVERSE_SIZES, "targets", dividend_targets),
+        "core_dca.analyze": ((1,), "targets", core_dca),
+        "advisor.gather+route": (UNIVERSE_SIZES, "targets", advisor),
+        "backtest.run_backtest": (HISTORY_DAYS, "days", backtest),
+    }
+
+
+def measure(fn, size: int, repeat: int, budget: float) -> dict:
+    fn()  # 预热：导入、首次分配不计入
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "size": size,
+        "calls": len(samples),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+        "throughput": size / (float(ms.mean()) / 1000),
+        "peak_kb": peak / 1024,
+    }
+
+
+def run(selected=None, repeat: int = 20, budget: float = 2.0, max_size: int | None = None) -> dict:
+    results = {}
+    for name, (sizes, unit, setup) in cases().items():
+        if selected and not any(s in name for s in selected):
+            continue
+        for size in sizes:
+            if max_size and size > max_size:
+                continue
+            context, fn = setup(size)
+            with context:
+                res = measure(fn, size, repeat, budget)
+            res["unit"] = unit
+            results[f"{name}@{size}"] = res
+            log(f"{name} @ {size:,} {unit}: p50 {res['p50_ms']:.3f} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        res["vs_baseline"] = res["p50_ms"] / base["p50_ms"] if base["p50_ms"] > 0 else float("nan")
+        if res["vs_baseline"] > tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def report(results: dict):
+    print(
+        f"\n{'case':<26}{'size':>8}{'calls':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}"
+        f"{'items/s':>14}{'peak KB':>11}{'scale':>7}{'vs base':>9}"
+    )
+    print("-" * 115)
+    prev = {}
+    for key, r in results.items():
+        name = key.rsplit("@", 1)[0]
+        # 相邻两个规模之间的缩放指数：1.0 为线性，明显大于 1 说明出现了超线性开销
+        scale = ""
+        if name in prev and r["size"] > prev[name]["size"] and prev[name]["p50_ms"] > 0:
+            p = prev[name]
+            scale = f"{math.log(r['p50_ms'] / p['p50_ms']) / math.log(r['size'] / p['size']):.2f}"
+        prev[name] = r
+        vs = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else ""
+        print(
+            f"{name:<26}{r['size']:>8,}{r['calls']:>7}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}{r['p99_ms']:>11.3f}"
+            f"{r['throughput']:>14,.0f}{r['peak_kb']:>11,.1f}{scale:>7}{vs:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite on synthetic universes")
+    parser.add_argument("--case", action="append", default=None, help="Only run cases whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per point")
+    parser.add_argument("--budget", type=float, default=2.0, help="Max seconds per point (at least 3 calls)")
+    parser.add_argument("--max-size", type=int, default=None, help="Skip universe/history sizes above this")
+    parser.add_argument("--baseline", default=None, help="Compare against a saved baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="p50 slowdown ratio counted as a regression")
+    parser.add_argument("--save-baseline", default=None, help="Write results as a baseline JSON")
+    args = parser.parse_args()
+
+    print("\n=== 离线性能基准（合成数据）===")
+    results = run(args.case, args.repeat, args.budget, args.max_size)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+    report(results)
+
+    if args.save_baseline:
+        meta = {"python": sys.version.split()[0], "platform": platform.platform(), "date": date.today().isoformat()}
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        log(f"基线已保存: {args.save_baseline}")
+
+    if regressions:
+        print(f"\n⚠️ 相对基线变慢超过 {args.tolerance:.2f}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# 行情数据缓存：进程内存 + 磁盘两级，按 source/symbol/日期 建 key。
+# 所有策略模块共享同一份缓存，同一个 key 在并发场景下只会真正抓取一次。
+import hashlib
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from src import profiling
+from src.config import CACHE_CONFIG
+
+_memory: dict[str, tuple[float, object]] = {}
+# 正在抓取的 key -> [锁, 持有/等待的线程数]；计数归零即删除，长期运行（watch）时 key 每天都在变也不会增长。
+# 每个 key 一把独立的锁：fetch 里嵌套抓取其他 key（ETF 快照索引 -> 全市场快照表）不会锁到自己
+_key_locks: dict[str, list] = {}
+_guard = threading.Lock()
+
+
+def make_key(source: str, symbol: str, day: str | None = None) -> str:
+    day = day or date.today().isoformat()
+    return f"{source}:{symbol}:{day}"
+
+
+def _cache_dir() -> str:
+    return CACHE_CONFIG["DIR"]
+
+
+def _path(key: str) -> str:
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(_cache_dir(), f"{name}.pkl")
+
+
+def _ttl(ttl: float | None) -> float:
+    return float(CACHE_CONFIG["TTL_SECONDS"] if ttl is None else ttl)
+
+
+@contextmanager
+def _key_lock(key: str):
+    with _guard:
+        entry = _key_locks.get(key)
+        if entry is None:
+            entry = _key_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _key_locks[key]
+
+
+# 返回 (hit, value)；过期或不存在时 hit 为 False
+def get(key: str, ttl: float | None = None):
+    if not CACHE_CONFIG.get("ENABLED", True):
+        return False, None
+
+    max_age = _ttl(ttl)
+    now = time.time()
+
+    entry = _memory.get(key)
+    if entry is not None and now - entry[0] <= max_age:
+        return True, entry[1]
+
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            record = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False, None
+
+    if record.get("key") != key or now - record["ts"] > max_age:
+        return False, None
+
+    # 更新访问时间，供淘汰策略使用
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    _memory[key] = (record["ts"], record["value"])
+    return True, record["value"]
+
+
+# 写入缓存，返回序列化后的字节数
+def put(key: str, value) -> int:
+    if not CACHE_CONFIG.get("ENABLED", True):
+        return 0
+
+    ts = time.time()
+    _memory[key] = (ts, value)
+    if len(_memory) > CACHE_CONFIG["MAX_ENTRIES"]:
+        oldest = min(_memory, key=lambda k: _memory[k][0])
+        _memory.pop(oldest, None)
+
+    payload = pickle.dumps({"key": key, "ts": ts, "value": value}, protocol=pickle.HIGHEST_PROTOCOL)
+    os.makedirs(_cache_dir(), exist_ok=True)
+    path = _path(key)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    _evict()
+    return len(payload)
+
+
+def get_or_fetch(source: str, symbol: str, fetch, ttl: float | None = None, day: str | None = None):
+    with profiling.stage(f"{source}:{symbol}"):
+        key = make_key(source, symbol, day)
+        hit, value = get(key, ttl)
+        if hit:
+            profiling.record(hit=True)
+            return value
+
+        # 同一个 key 只允许一个线程抓取，其余线程等待后直接读缓存
+        with _key_lock(key):
+            hit, value = get(key, ttl)
+            if hit:
+                profiling.record(hit=True)
+                return value
+            value = fetch()
+            profiling.record(put(key, value), hit=False)
+            return value
+
+
+def _evict():
+    try:
+        entries = []
+        with os.scandir(_cache_dir()) as it:
+            for e in it:
+                if e.name.endswith(".pkl"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    if len(entries) <= CACHE_CONFIG["MAX_ENTRIES"] and total <= CACHE_CONFIG["MAX_BYTES"]:
+        return
+
+    entries.sort()
+    while entries and (
+        len(entries) > CACHE_CONFIG["MAX_ENTRIES"] or total > CACHE_CONFIG["MAX_BYTES"]
+    ):
+        _, size, path = entries.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def clear():
+    _memory.clear()
+    try:
+        with os.scandir(_cache_dir()) as it:
+            for e in it:
+                if e.name.endswith(".pkl"):
+                    os.remove(e.path)
+    except OSError:
+        pass
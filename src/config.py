@@ -5,6 +5,123 @@ BENCHMARK_TICKER = "^IRX"  # 3个月期美债收益率 (13 Week Treasury Bill)
 # 全局手动覆盖 (如果不为空，则优先使用)
 MANUAL_US_RATE = None  # 例如: 4.25
 
+# 行情数据缓存（各策略共享；同一交易日内重复运行不再重复下载）
+# - TTL_SECONDS: 缓存有效期，过期后重新抓取
+# - MAX_ENTRIES / MAX_BYTES: 磁盘缓存上限，超出后按最久未访问淘汰
+CACHE_CONFIG = {
+    "ENABLED": True,
+    "DIR": ".cache/market_data",
+    "TTL_SECONDS": 15 * 60,
+    "MAX_ENTRIES": 256,
+    "MAX_BYTES": 64 * 1024 * 1024,
+}
+
+# 数据源后端（src.providers）
+# - BACKEND: "live"（akshare/yfinance 实时接口）| "fixture"（回放 FIXTURE_DIR 里录制的响应，完全离线）
+#            | "record"（实时抓取并把响应录制到 FIXTURE_DIR）
+PROVIDER_CONFIG = {
+    "BACKEND": "live",
+    "FIXTURE_DIR": "data/fixtures",
+}
+
+# 网络层（src.net）：联网抓取共用连接池，失败按原因有限重试；港股报价与美债基准在主数据源
+# （yfinance）超过 HEDGE_AFTER 秒未返回时，并发请求备用源（Yahoo chart 接口），先返回者为准
+# - RETRIES: 每个请求最多尝试的次数（含首次）；BACKOFF: 首次重试前的等待秒数，之后逐次翻倍
+# - POOL_REQUESTS: 是否让 akshare 的 requests.get/post 走共享连接池
+# - YAHOO_CHART_URL: 备用报价接口地址，测试时可指向本地桩服务
+NET_CONFIG = {
+    "TIMEOUT": 10,
+    "RETRIES": 3,
+    "BACKOFF": 0.5,
+    "HEDGE_AFTER": 2.0,
+    "POOL_SIZE": 16,
+    "POOL_REQUESTS": True,
+    "USER_AGENT": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "YAHOO_CHART_URL": "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}",
+}
+
+# 本地历史库（src.history_store）：日线价格/分红/美债基准，回测与筛选可离线运行
+# - START: 首次抓取的起始日期；之后只增量抓取最后一行之后的数据
+HISTORY_CONFIG = {
+    "DIR": "data/history",
+    "START": "2005-01-01",
+}
+
+# 综合方案（src.advisor）的基础资金配置（合计 = 1），对应 SOP 里的 2:4:3:1 模型
+ADVISOR_SPLIT = {
+    "growth": 0.1,    # 增长层：纳指/BTC
+    "defense": 0.2,   # 防御层：美元短债
+    "a_share": 0.4,   # A股红利
+    "hk_share": 0.3,  # 港股红利
+}
+
+# 持仓账本（src.ledger）：买卖/分红事件只追加写入，定期写快照；advisor 据此给出 SELL 的卖出数量与组合股息率
+# - SNAPSHOT_EVERY: 快照之后累计多少个事件就写新快照（读取时最多回放这么多事件）
+# - SELL_FRACTION: SELL 信号建议卖出的持仓比例（与回测的 sell_fraction 一致）
+# - LOT_SIZE: A股卖出数量向下取整的每手股数；港股各标的每手股数不同，必须在 HK_SHARE_TARGETS 里用 "lot" 指定
+LEDGER_CONFIG = {
+    "DIR": "data/ledger",
+    "DEFAULT_ACCOUNT": "main",
+    "SNAPSHOT_EVERY": 500,
+    "SELL_FRACTION": 0.1,
+    "LOT_SIZE": 100,
+}
+
+# 综合方案（src.advisor）各数据源的超时时间（秒）
+# 三个数据源并发抓取；某个数据源超时后按 DATA_ERROR 处理（等同观望），不会阻塞整份方案。
+ADVISOR_TIMEOUTS = {
+    "benchmark": 15,  # 美债基准
+    "a_share": 30,    # A股 ETF 行情 + 分红
+    "hk_share": 30,   # 港股批量报价
+}
+
+# 综合方案的蒙特卡洛压力测试（uv run -m src.advisor 20000 --stress 100000）
+# 波动率为年化值（美债收益率单位为百分点），按 HORIZON_DAYS 个交易日缩放成一个定投周期；
+# --calibrate 时改用本地历史库最近 CALIBRATION_YEARS 年的日线估计波动率与相关系数
+STRESS_CONFIG = {
+    "SCENARIOS": 100_000,
+    "HORIZON_DAYS": 21,
+    "RATE_VOL": 1.0,       # ^IRX 年化波动（百分点）
+    "A_SHARE_VOL": 0.18,   # A股红利 ETF
+    "HK_VOL": 0.22,        # 港股红利共同因子
+    "HK_IDIO_VOL": 0.15,   # 港股单个标的的特质波动
+    "CORRELATION": {
+        ("rate", "a_share"): 0.0,
+        ("rate", "hk_share"): -0.1,
+        ("a_share", "hk_share"): 0.5,
+    },
+    "CALIBRATION_YEARS": 5,
+    "QUANTILES": (5, 25, 50, 75, 95),
+}
+
+# 常驻监控（src.watch）：按间隔轮询行情，信号跨档（如 HOLD -> STRONG_BUY）时输出事件
+# - EVENTS_FILE: 事件追加写入的 JSONL 文件；None 表示只打印
+WATCH_CONFIG = {
+    "INTERVAL_SECONDS": 60,
+    "EVENTS_FILE": None,
+}
+
+# 利差的流式统计（src.spread_stats）：A股/港股策略与 advisor 每次运行把利差计入各标的的历史，报告 z-score 与历史分位
+# - HALFLIFE_DAYS: 指数加权的半衰期（观测天数）
+# - MIN_OBSERVATIONS: 累计观测天数少于此值时不报告 z-score 与分位
+# - BIN_MIN / BIN_MAX / BIN_WIDTH: 分位数直方图的利差范围与分箱宽度（单位 %），超出范围的计入首尾分箱
+SPREAD_STATS_CONFIG = {
+    "ENABLED": True,
+    "FILE": "data/spread_stats.json",
+    "HALFLIFE_DAYS": 250,
+    "MIN_OBSERVATIONS": 20,
+    "BIN_MIN": -10.0,
+    "BIN_MAX": 15.0,
+    "BIN_WIDTH": 0.05,
+}
+
+# 运行日志（src.journal）：每次运行 A股/港股/核心定投/分红池策略与综合方案时，把信号、指标、方案
+# 以及当时生效的 MANUAL_* 覆盖追加写入本地 SQLite，按日期与标的建索引，可用 uv run -m src.journal 查询
+JOURNAL_CONFIG = {
+    "ENABLED": True,
+    "FILE": "data/journal.sqlite3",
+}
+
 # 负债/机会成本基准（人民币）
 # 用于“稳定现金流”策略的最低回报门槛：建议取较高的贷款利率或你自己的机会成本。
 # 你提供的商业房贷利率为 3.0%，可作为默认门槛。
@@ -25,6 +142,28 @@ CORE_DCA_CONFIG = {
     "DEFENSE_SUGGESTION": "人民币货基/短债；或美元短债/短期国债（如 SGOV/T-Bills）",
 }
 
+# 核心定投的长期现金流推演（uv run -m src.strategy_core_dca 20000 --project 20）
+# 按核心定投的档位逐月分配新增资金、分红再投入，批量模拟股息率与每股分红路径，
+# 估计每月分红首次覆盖负债利息的月份；目标月收入 = LIABILITY * CNY_HURDLE_RATE / 100 / 12
+# - YIELD_MEAN: 股息率长期均值（%）；None 表示以当前决策口径的股息率为均值
+# - YIELD_VOL / YIELD_REVERSION: 对数股息率的年化波动与均值回归速度（1/年）
+# - DIV_GROWTH / DIV_VOL: 每股分红的年化增长率与波动
+# - CONTRIBUTION_GROWTH: 每月新增资金的年增长率（每满 12 个月上调一次）
+# - DEFENSE_RATE: 防御/现金类资产的年化收益（%），利息滚存
+PROJECTION_CONFIG = {
+    "YEARS": 20,
+    "PATHS": 5000,
+    "LIABILITY": 1_000_000,
+    "YIELD_MEAN": None,
+    "YIELD_VOL": 0.20,
+    "YIELD_REVERSION": 0.5,
+    "DIV_GROWTH": 0.03,
+    "DIV_VOL": 0.08,
+    "CONTRIBUTION_GROWTH": 0.0,
+    "DEFENSE_RATE": 2.0,
+    "REPORT_EVERY_YEARS": 5,
+}
+
 # A股分红资产池（用于挑选“本月更值得加仓”的标的）
 # 说明：
 # - 股票分红口径建议用“过去12个月每股现金分红合计”（TTM），并手动维护。
@@ -54,6 +193,15 @@ A_SHARE_DIVIDEND_TARGETS = {
     },
 }
 
+# 全市场分红筛选（uv run -m src.strategy_a_share_dividend_targets --screen）
+SCREENER_CONFIG = {
+    "TOP_N": 20,
+    "MIN_TURNOVER": 5e7,       # 当日成交额下限（元），过滤流动性不足的标的
+    "LOOKBACK_YEARS": 5,       # 分红连续性统计窗口
+    "MIN_DIVIDEND_YEARS": 3,   # 窗口内至少有几个年份分过红
+    "FETCH_THREADS": 8,        # --fetch-dividends 时并发抓取 ETF 分红的线程数
+}
+
 # A股策略配置
 A_SHARE_CONFIG = {
     "CODE": "563020",  # 红利低波 ETF
@@ -78,25 +226,37 @@ HK_THRESHOLDS = {
     "STOP_BUY": 0.5
 }
 
+# 港股逐标的回测（src.backtest_hk）：价格与分红按汇率换成美元，与美元计价的 ^IRX 基准同口径
+# - FX_TICKER: 美元兑港元汇率（Yahoo 代码，值为 1 美元可换的港元），存入本地历史库
+# - FX_FALLBACK: 历史库缺少汇率时使用的联系汇率
+HK_BACKTEST_CONFIG = {
+    "FX_TICKER": "HKD=X",
+    "FX_FALLBACK": 7.8,
+}
+
 HK_SHARE_TARGETS = {
     "0939.HK": {
         "name": "建设银行",
         "manual_div": 0.42, 
-        "MANUAL_PRICE": None
+        "MANUAL_PRICE": None,
+        "lot": 1000,  # 每手股数
     },
     "0883.HK": {
         "name": "中国海洋石油",
         "manual_div": 1.39, 
-        "MANUAL_PRICE": None
+        "MANUAL_PRICE": None,
+        "lot": 1000,  # 每手股数
     },
     "0005.HK": {
         "name": "汇丰控股",
         "manual_div": 5.14, 
-        "MANUAL_PRICE": None
+        "MANUAL_PRICE": None,
+        "lot": 400,  # 每手股数
     },
     "3110.HK": {
         "name": "GX恒生高股息",
         "manual_div": 3.0, # Approximate, needs update
-        "MANUAL_PRICE": None
+        "MANUAL_PRICE": None,
+        "lot": 100,  # 每手股数
     }
 }
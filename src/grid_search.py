@@ -0,0 +1,311 @@
+# 综合方案参数寻优：对 HK_THRESHOLDS、A_SHARE_CONFIG["THRESHOLDS"] 和 ADVISOR_SPLIT 做网格搜索。
+# 每组参数都在历史月度数据上回放 advisor 的信号 + 自由资金/防御层路由逻辑（src.routing.route_arrays），
+# 用“期末财富 / 累计投入”打分。组合按块向量化计算，并通过进程池铺满所有 CPU 核心。
+#
+# 用法示例:
+#   uv run -m src.grid_search --grid a.BUY_DIP=1:3:0.25 --grid hk.BUY_DIP=2:4:0.5 \
+#       --grid split.defense=0.1,0.2,0.3 --grid split.hk_share=0.2,0.3,0.4 --out sweep.csv
+# 未指定的参数固定为 src/config.py 的当前值；资金比例合计不为 1、或阈值次序不合理的组合会被跳过。
+import argparse
+import csv
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+import numpy as np
+
+from src import profiling
+from src.backtest_a_share import align_asof, load_history, month_starts
+from src.config import A_SHARE_CONFIG, ADVISOR_SPLIT, HK_SHARE_TARGETS, HK_THRESHOLDS
+from src.routing import BUCKETS, route_arrays
+from src.signals import HOLD, classify_array
+from src.strategy_hk_us import DIVIDEND_TAX
+from src.ttm_dividend import TTMDividendSeries
+
+THRESHOLD_KEYS = ("BUY_DIP", "NORMAL_BUY", "TAKE_PROFIT", "STOP_BUY")
+SPLIT_KEYS = ("growth", "defense", "a_share", "hk_share")
+PARAM_NAMES = (
+    [f"a.{k}" for k in THRESHOLD_KEYS]
+    + [f"hk.{k}" for k in THRESHOLD_KEYS]
+    + [f"split.{k}" for k in SPLIT_KEYS]
+)
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def default_axes() -> dict[str, np.ndarray]:
+    axes = {}
+    for k in THRESHOLD_KEYS:
+        axes[f"a.{k}"] = np.array([A_SHARE_CONFIG["THRESHOLDS"][k]], dtype="float64")
+        axes[f"hk.{k}"] = np.array([HK_THRESHOLDS[k]], dtype="float64")
+    for k in SPLIT_KEYS:
+        axes[f"split.{k}"] = np.array([ADVISOR_SPLIT[k]], dtype="float64")
+    return axes
+
+
+def parse_axis(spec: str) -> np.ndarray:
+    # "start:stop:step"（含端点）或 "v1,v2,v3"；格式不对、step <= 0 或 stop < start 时抛出 ValueError
+    if ":" in spec:
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"expected start:stop:step, got {spec!r}")
+        start, stop, step = (float(x) for x in parts)
+        if not step > 0:
+            raise ValueError(f"step must be positive: {spec!r}")
+        if stop < start:
+            raise ValueError(f"stop must not be below start: {spec!r}")
+        n = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return np.round(start + step * np.arange(n), 10)
+    return np.array([float(x) for x in spec.split(",")], dtype="float64")
+
+
+def _total_return_index(prices, div_per_share) -> np.ndarray:
+    # 分红再投资的总回报指数：TR_t = TR_{t-1} * (P_t + D_t) / P_{t-1}
+    prices = np.asarray(prices, dtype="float64")
+    growth = np.ones(len(prices))
+    growth[1:] = (prices[1:] + div_per_share[1:]) / prices[:-1]
+    return np.cumprod(np.where(np.isfinite(growth), growth, 1.0))
+
+
+def _events_on_days(dates, event_dates, amounts) -> np.ndarray:
+    out = np.zeros(len(dates))
+    idx = np.searchsorted(dates, np.asarray(event_dates, dtype="datetime64[D]"), side="left")
+    ok = idx < len(dates)
+    np.add.at(out, idx[ok], np.asarray(amounts, dtype="float64")[ok])
+    return out
+
+
+@profiling.timed("grid_search.build_replay")
+def build_replay(start: str, end: str, growth_ticker: str | None = None, offline: bool = False) -> dict:
+    # 构造月度回放数据：A股收益率、港股各标的税后收益率、美债利率，以及每个 bucket 从当月到期末的增值倍数
+    from src import history_store
+
+    dates, a_prices, a_div_dates, a_div_amounts, rates = load_history(A_SHARE_CONFIG["CODE"], start, end, offline)
+    months = np.flatnonzero(month_starts(dates) & ~np.isnan(rates))
+    if len(months) == 0:
+        # 区间内没有可回放的月份：返回空回放，由调用方报告“无数据”
+        empty = np.empty(0)
+        return {"months": dates[months], "a_spread": empty, "hk_best_spread": empty, "factors": np.empty((0, len(BUCKETS)))}
+
+    a_ttm = TTMDividendSeries(a_div_dates, a_div_amounts).ttm_at(dates[months])
+    a_yield = a_ttm / a_prices[months] * 100
+
+    tr_a = _total_return_index(a_prices, _events_on_days(dates, a_div_dates, a_div_amounts))
+
+    codes = list(HK_SHARE_TARGETS)
+    hk_yield = np.full((len(months), len(codes)), np.nan)
+    hk_growth = np.full((len(months), len(codes)), np.nan)
+    for j, code in enumerate(codes):
+        try:
+            px_dates, px = history_store.get_series("price", code, start, end, offline=offline)
+            div_dates, div_amounts = history_store.get_series("dividend", code, offline=offline)
+        except RuntimeError as e:
+            log(f"跳过 {code}: {e}")
+            continue
+        if len(px) == 0:
+            continue
+        px_daily = align_asof(dates, px_dates, px)
+        ttm = TTMDividendSeries(div_dates, div_amounts).ttm_at(dates[months])
+        hk_yield[:, j] = ttm * (1 - DIVIDEND_TAX) / px_daily[months] * 100
+        tr = _total_return_index(px_daily, _events_on_days(dates, div_dates, div_amounts * (1 - DIVIDEND_TAX)))
+        hk_growth[:, j] = tr[-1] / tr[months]
+
+    # 防御层按 ^IRX 逐日计息
+    gap_days = np.diff(dates).astype("int64")
+    accrual = np.concatenate(([0.0], np.nan_to_num(rates[:-1]) / 100 * gap_days / 365))
+    defense_index = np.exp(np.cumsum(accrual))
+
+    if growth_ticker:
+        g_dates, g_close = history_store.get_series("price", growth_ticker, start, end, offline=offline)
+        g_px = align_asof(dates, g_dates, g_close)
+        growth_factor = np.nan_to_num(g_px[-1] / g_px[months], nan=1.0)
+    else:
+        growth_factor = np.ones(len(months))
+
+    with np.errstate(invalid="ignore"):
+        hk_factor = np.nanmean(hk_growth, axis=1)
+    factors = np.column_stack(
+        [
+            growth_factor,
+            defense_index[-1] / defense_index[months],
+            tr_a[-1] / tr_a[months],
+            np.nan_to_num(hk_factor, nan=1.0),
+        ]
+    )
+    # 港股全部无数据的月份记为 NaN（信号按 HOLD）
+    has_hk = ~np.isnan(hk_yield).all(axis=1)
+    hk_best = np.where(has_hk, np.max(np.where(np.isnan(hk_yield), -np.inf, hk_yield), axis=1), np.nan)
+
+    # factors 的列与 BUCKETS 顺序一致
+    return {
+        "months": dates[months],
+        "a_spread": a_yield - rates[months],
+        # 港股综合信号取最强标的，而信号随利差单调，所以只需最大利差
+        "hk_best_spread": hk_best - rates[months],
+        "factors": factors,
+    }
+
+
+def valid_mask(params: np.ndarray) -> np.ndarray:
+    # 阈值次序需满足 TAKE_PROFIT <= STOP_BUY < NORMAL_BUY <= BUY_DIP，资金比例合计为 1
+    col = {name: params[:, i] for i, name in enumerate(PARAM_NAMES)}
+    valid = np.ones(len(params), dtype=bool)
+    for prefix in ("a", "hk"):
+        valid &= col[f"{prefix}.TAKE_PROFIT"] <= col[f"{prefix}.STOP_BUY"]
+        valid &= col[f"{prefix}.STOP_BUY"] < col[f"{prefix}.NORMAL_BUY"]
+        valid &= col[f"{prefix}.NORMAL_BUY"] <= col[f"{prefix}.BUY_DIP"]
+    split_sum = sum(col[f"split.{k}"] for k in SPLIT_KEYS)
+    return valid & (np.abs(split_sum - 1.0) < 1e-6)
+
+
+def evaluate(replay: dict, params: np.ndarray) -> np.ndarray:
+    # params: (C, len(PARAM_NAMES))，每行一组参数；返回 (C,) 的得分（期末财富 / 累计投入）
+    col = {name: params[:, i : i + 1] for i, name in enumerate(PARAM_NAMES)}
+    a_th = {k: col[f"a.{k}"] for k in THRESHOLD_KEYS}
+    hk_th = {k: col[f"hk.{k}"] for k in THRESHOLD_KEYS}
+    sig_a = classify_array(replay["a_spread"][None, :], a_th)
+    # 港股全部无数据的月份按 HOLD
+    sig_hk = classify_array(replay["hk_best_spread"][None, :], hk_th, missing=HOLD)
+
+    split = {k: col[f"split.{k}"] for k in SPLIT_KEYS}
+    plan = route_arrays(1.0, sig_a, sig_hk, split)
+    factors = replay["factors"]
+    wealth = sum(plan[b] @ factors[:, i] for i, b in enumerate(BUCKETS))
+    return wealth / factors.shape[0]
+
+
+_REPLAY = None
+_AXES = None
+
+
+def _init_worker(replay, axes):
+    global _REPLAY, _AXES
+    _REPLAY, _AXES = replay, axes
+
+
+def _params_for(start: int, stop: int, axes: list[np.ndarray]) -> np.ndarray:
+    idx = np.unravel_index(np.arange(start, stop), [len(a) for a in axes])
+    return np.column_stack([a[i] for a, i in zip(axes, idx)])
+
+
+def _run_chunk(start: int, stop: int, top_k: int, keep_all: bool):
+    params = _params_for(start, stop, _AXES)
+    params = params[valid_mask(params)]
+    score = evaluate(_REPLAY, params)
+    if keep_all:
+        return params, score, len(score)
+    return (*_top(params, score, top_k), len(score))
+
+
+def _top(params: np.ndarray, score: np.ndarray, k: int):
+    if len(score) <= k:
+        return params, score
+    top = np.argpartition(-score, k)[:k]
+    return params[top], score[top]
+
+
+@profiling.timed("grid_search.sweep")
+def sweep(replay, axes: dict, workers: int, chunk_size: int, top_k: int, out_path: str | None):
+    axis_list = [axes[name] for name in PARAM_NAMES]
+    total = int(np.prod([len(a) for a in axis_list]))
+    ranges = [(s, min(s + chunk_size, total)) for s in range(0, total, chunk_size)]
+
+    best: list[tuple[float, tuple]] = []
+    n_valid = 0
+    writer = None
+    out_file = open(out_path, "w", newline="") if out_path else None
+    try:
+        if out_file:
+            writer = csv.writer(out_file)
+            writer.writerow(list(PARAM_NAMES) + ["score"])
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(replay, axis_list)
+        ) as pool:
+            futures = [pool.submit(_run_chunk, s, e, top_k, writer is not None) for s, e in ranges]
+            done = 0
+            for fut in as_completed(futures):
+                params, score, valid = fut.result()
+                n_valid += valid
+                done += 1
+                if writer:
+                    writer.writerows(np.column_stack([params, score]).tolist())
+                params, score = _top(params, score, top_k)
+                for row, sc in zip(params.tolist(), score.tolist()):
+                    item = (sc, tuple(row))
+                    if len(best) < top_k:
+                        heapq.heappush(best, item)
+                    elif sc > best[0][0]:
+                        heapq.heapreplace(best, item)
+                if done % max(1, len(futures) // 10) == 0 or done == len(futures):
+                    log(f"进度 {done}/{len(futures)} 块 | 有效组合 {n_valid:,}")
+    finally:
+        if out_file:
+            out_file.close()
+
+    return total, n_valid, sorted(best, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-core threshold/split grid search over advisor routing")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        metavar="NAME=SPEC",
+        help=f"Parameter range, SPEC is start:stop:step or v1,v2,... NAME in: {', '.join(PARAM_NAMES)}",
+    )
+    parser.add_argument("--start", default="2015-01-01", help="Replay start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="Replay end date (YYYY-MM-DD)")
+    parser.add_argument("--growth-ticker", default=None, help="Yahoo ticker for the growth bucket (default: cash)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Combinations per task")
+    parser.add_argument("--top", type=int, default=20, help="Rows in the ranked table")
+    parser.add_argument("--out", default=None, help="Stream every valid combination to this CSV file")
+    parser.add_argument("--offline", action="store_true", help="Use the local history store only")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "grid_search"):
+        axes = default_axes()
+        for item in args.grid:
+            name, _, spec = item.partition("=")
+            if name not in axes:
+                parser.error(f"unknown parameter: {name}")
+            try:
+                axes[name] = parse_axis(spec)
+            except ValueError as e:
+                parser.error(f"--grid {name}: {e}")
+
+        total = int(np.prod([len(a) for a in axes.values()]))
+        print(f"\n=== 综合方案参数寻优: {total:,} 组组合 | {args.workers} 进程 ===")
+        try:
+            replay = build_replay(args.start, args.end, args.growth_ticker, args.offline)
+        except Exception as e:
+            log(f"历史数据获取失败: {e}")
+            return
+        if len(replay["months"]) == 0:
+            log(f"回放区间 {args.start} ~ {args.end} 内没有数据，跳过寻优。")
+            return
+        print(f"回放区间: {replay['months'][0]} ~ {replay['months'][-1]} | {len(replay['months'])} 个月")
+
+        t0 = time.perf_counter()
+        total, n_valid, best = sweep(replay, axes, args.workers, args.chunk_size, args.top, args.out)
+        elapsed = time.perf_counter() - t0
+        print(f"完成: {n_valid:,}/{total:,} 组有效 | 耗时 {elapsed:.2f}s | {total / max(elapsed, 1e-9):,.0f} 组/秒")
+
+        swept = [name for name in PARAM_NAMES if len(axes[name]) > 1]
+        header = ["rank", "score"] + swept
+        print("-" * (12 * len(header)))
+        print("".join(f"{h:>12}" for h in header))
+        for rank, (score, row) in enumerate(best, 1):
+            values = dict(zip(PARAM_NAMES, row))
+            print(f"{rank:>12}{score:>12.4f}" + "".join(f"{values[n]:>12.4g}" for n in swept))
+        if args.out:
+            print(f"全部结果已写入: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# 本地历史库：日线价格、分红事件、美债基准，按 kind/symbol 分区存成列式 .npy 文件。
+#   data/history/<kind>/<symbol>/date.npy   datetime64[D]，升序
+#   data/history/<kind>/<symbol>/<col>.npy  float64，与 date 等长
+# 读取时用内存映射（np.load(mmap_mode="r")），20 年 x 500 个标的也只按需分页载入；
+# 价格增量更新从最后一行起重抓并覆盖（修正盘中存下的临时收盘价），分红按 (日期, 金额) 去重合并；
+# 每个分区的读-合并-写在 <分区>.lock 的排他锁下完成，读取持共享锁，多线程/多进程同时更新也不会读到长度不一的列；
+# 回测/筛选可以完全离线运行。
+#
+# 用法:
+#   uv run -m src.history_store update            # 更新 config 里全部标的 + 美债基准
+#   uv run -m src.history_store update 563020 0939.HK --kinds price
+#   uv run -m src.history_store info
+import argparse
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src import profiling
+from src.config import A_SHARE_CONFIG, A_SHARE_DIVIDEND_TARGETS, BENCHMARK_TICKER, HISTORY_CONFIG, HK_SHARE_TARGETS
+
+KINDS = {
+    "price": ("close",),
+    "dividend": ("amount",),
+}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def _partition(kind: str, symbol: str) -> str:
+    return os.path.join(HISTORY_CONFIG["DIR"], kind, symbol.replace("^", "_"))
+
+
+@contextmanager
+def _locked(kind: str, symbol: str, shared: bool = False):
+    # 分区级的文件锁（<分区>.lock）：写入方排他，读取方共享，读到的各列总是同一次写入的结果
+    path = _partition(kind, symbol)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def load(kind: str, symbol: str, mmap: bool = True) -> dict[str, np.ndarray] | None:
+    path = _partition(kind, symbol)
+    if not os.path.exists(os.path.join(path, "date.npy")):
+        return None
+    mode = "r" if mmap else None
+    with _locked(kind, symbol, shared=True):
+        return _load(path, kind, mode)
+
+
+def _load(path: str, kind: str, mode: str | None) -> dict[str, np.ndarray] | None:
+    if not os.path.exists(os.path.join(path, "date.npy")):
+        return None
+    return {
+        col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode=mode)
+        for col in ("date",) + KINDS[kind]
+    }
+
+
+def last_date(kind: str, symbol: str) -> np.datetime64 | None:
+    data = load(kind, symbol)
+    if data is None or len(data["date"]) == 0:
+        return None
+    return data["date"][-1]
+
+
+def _write(kind: str, symbol: str, dates: np.ndarray, columns: dict):
+    # 写入先落临时文件再替换，避免中断留下半截文件；调用方持有该分区的排他锁
+    path = _partition(kind, symbol)
+    os.makedirs(path, exist_ok=True)
+    for col, values in (("date", dates), *columns.items()):
+        target = os.path.join(path, f"{col}.npy")
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp, target)
+
+
+def _sorted(kind: str, dates, columns: dict) -> tuple[np.ndarray, dict]:
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    order = np.argsort(dates, kind="stable")
+    return dates[order], {col: np.asarray(columns[col], dtype="float64")[order] for col in KINDS[kind]}
+
+
+def append(kind: str, symbol: str, dates, columns: dict, replace_from=None) -> int:
+    # 追加晚于最后一行的数据，返回新增行数。
+    # replace_from: 本地库里该日期及之后的行被新数据整体替换（用于修正之前存下的临时收盘价）
+    dates, columns = _sorted(kind, dates, columns)
+    with _locked(kind, symbol):
+        return _append(kind, symbol, dates, columns, replace_from)
+
+
+def _append(kind: str, symbol: str, dates, columns: dict, replace_from) -> int:
+    old = _load(_partition(kind, symbol), kind, None)
+    if old is not None and len(old["date"]):
+        if replace_from is None:
+            cut = len(old["date"])
+            keep = dates > old["date"][-1]
+        else:
+            cut = int(np.searchsorted(old["date"], np.datetime64(replace_from, "D"), side="left"))
+            keep = dates >= np.datetime64(replace_from, "D")
+        if not keep.any():
+            return 0  # 没抓到新数据（含重抓失败返回空表）时不动本地库
+        added = int(keep.sum()) - (len(old["date"]) - cut)
+        dates = np.concatenate([old["date"][:cut], dates[keep]])
+        columns = {col: np.concatenate([old[col][:cut], columns[col][keep]]) for col in columns}
+    else:
+        # 首次写入即使为空也落盘（例如从未分红的标的），表示“已抓取过”
+        added = len(dates)
+
+    _write(kind, symbol, dates, columns)
+    return added
+
+
+def merge_events(kind: str, symbol: str, dates, columns: dict) -> int:
+    # 事件类数据（分红）按 (日期, 数值) 去重合并：晚公布、登记日更早的事件也能补进来。返回新增行数
+    dates, columns = _sorted(kind, dates, columns)
+    with _locked(kind, symbol):
+        return _merge_events(kind, symbol, dates, columns)
+
+
+def _merge_events(kind: str, symbol: str, dates, columns: dict) -> int:
+    col = KINDS[kind][0]
+    old = _load(_partition(kind, symbol), kind, None)
+    if old is None:
+        _write(kind, symbol, dates, columns)
+        return len(dates)
+
+    seen = set(zip(old["date"].tolist(), old[col].tolist()))
+    new = np.zeros(len(dates), dtype=bool)
+    for i, event in enumerate(zip(dates.tolist(), columns[col].tolist())):
+        if event not in seen:
+            seen.add(event)  # 同一批里的重复事件只算一次
+            new[i] = True
+    if not new.any():
+        return 0
+    merged_dates, merged = _sorted(
+        kind,
+        np.concatenate([old["date"], dates[new]]),
+        {col: np.concatenate([old[col], columns[col][new]])},
+    )
+    _write(kind, symbol, merged_dates, merged)
+    return int(new.sum())
+
+
+@profiling.timed("history_store.update")
+def update(kind: str, symbol: str) -> int:
+    from src import market_data
+
+    today = date.today()
+    last = last_date(kind, symbol)
+    if kind == "price":
+        # 从最后一行（含）开始重新抓取并覆盖：盘中运行时存下的当天“收盘价”在之后的更新里会被最终收盘价修正
+        start = HISTORY_CONFIG["START"] if last is None else str(last)
+        # yfinance 的 end 不含当天
+        end = (today + timedelta(days=1)).isoformat()
+        df = market_data.fetch_price_history(symbol, start, end)
+        return append(
+            kind, symbol, df["date"].to_numpy(dtype="datetime64[D]"), {"close": df["close"]},
+            replace_from=None if last is None else last,
+        )
+
+    # 分红接口只能整表返回，按 (日期, 金额) 与本地合并去重
+    df = market_data.fetch_dividend_events(symbol)
+    return merge_events(
+        kind, symbol, df["date"].to_numpy(dtype="datetime64[D]"), {"amount": df["amount"].to_numpy(dtype="float64")}
+    )
+
+
+def get_series(kind: str, symbol: str, start: str | None = None, end: str | None = None, offline: bool = False):
+    # 返回 (dates, values) 的内存映射切片；非离线模式下先做一次增量更新
+    if not offline:
+        try:
+            update(kind, symbol)
+        except Exception as e:
+            log(f"{kind}/{symbol} 增量更新失败，使用本地数据: {e}")
+
+    data = load(kind, symbol)
+    if data is None:
+        raise RuntimeError(f"本地历史库缺少 {kind}/{symbol}，请先运行: uv run -m src.history_store update {symbol}")
+    dates = data["date"]
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+    return dates[lo:hi], data[KINDS[kind][0]][lo:hi]
+
+
+def default_symbols() -> list[str]:
+    symbols = [A_SHARE_CONFIG["CODE"], *A_SHARE_DIVIDEND_TARGETS, *HK_SHARE_TARGETS]
+    return list(dict.fromkeys(symbols))
+
+
+def symbols(kind: str) -> list[str]:
+    root = os.path.join(HISTORY_CONFIG["DIR"], kind)
+    if not os.path.isdir(root):
+        return []
+    # 只列分区目录（跳过旁边的 .lock 文件）
+    return sorted(
+        name.replace("_", "^", 1) if name.startswith("_") else name
+        for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local columnar history store (prices, dividends, benchmark)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_update = sub.add_parser("update", help="Incrementally fetch new rows")
+    p_update.add_argument("symbols", nargs="*", help="Symbols (default: all targets in config + benchmark)")
+    p_update.add_argument("--kinds", nargs="+", choices=list(KINDS), default=list(KINDS))
+
+    sub.add_parser("info", help="List stored partitions")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "history_store"):
+        if args.command == "info":
+            for kind in KINDS:
+                for symbol in symbols(kind):
+                    data = load(kind, symbol)
+                    n = len(data["date"])
+                    span = f"{data['date'][0]} ~ {data['date'][-1]}" if n else "-"
+                    print(f"{kind:<10}{symbol:<12}{n:>8} 行  {span}")
+            return
+
+        targets = args.symbols or default_symbols()
+        jobs = [(kind, s) for s in targets for kind in args.kinds]
+        if not args.symbols and "price" in args.kinds:
+            jobs.append(("price", BENCHMARK_TICKER))
+        for kind, symbol in jobs:
+            try:
+                added = update(kind, symbol)
+                log(f"{kind}/{symbol}: 新增 {added} 行")
+            except Exception as e:
+                log(f"{kind}/{symbol}: 更新失败 {e}")
+
+
+if __name__ == "__main__":
+    main()
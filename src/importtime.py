@@ -0,0 +1,120 @@
+# 启动耗时基准：用 `python -X importtime` 在独立子进程里测量各入口的导入/启动时间，
+# 并检查手动模式下是否误加载了 akshare / yfinance / pandas / numpy 等重型依赖。
+# 用法: uv run -m src.importtime
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("akshare", "yfinance", "pandas", "numpy")
+
+# 所有 MANUAL_* 都填好时（PROMPT_AGENT.md 的流程），advisor 不应触发任何联网导入。
+# 与 src.benchmark 的 offline() 一样不写真实的运行日志和利差历史，账本读自临时目录
+# （临时目录由父进程创建并经环境变量传入，子进程里不额外导入 tempfile，避免计入导入耗时）
+_SCRATCH_ENV = "INVEST_BOT_IMPORTTIME_DIR"
+_ALL_MANUAL_PATCH = """
+import os
+import src.config as c
+c.JOURNAL_CONFIG["ENABLED"] = False
+c.SPREAD_STATS_CONFIG["ENABLED"] = False
+c.LEDGER_CONFIG["DIR"] = os.path.join(os.environ["INVEST_BOT_IMPORTTIME_DIR"], "ledger")
+c.MANUAL_US_RATE = 4.0
+c.A_SHARE_CONFIG["MANUAL_PRICE"] = 1.2
+c.A_SHARE_CONFIG["MANUAL_TTM_DIV"] = 0.06
+for info in c.HK_SHARE_TARGETS.values():
+    info["MANUAL_PRICE"] = 10.0
+"""
+
+_REPORT_HEAVY = """
+import sys
+print("HEAVY:" + ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+CASES = {
+    "strategy_core_dca": "import src.strategy_core_dca",
+    "strategy_a_share_dividend_targets": "import src.strategy_a_share_dividend_targets",
+    "advisor (import)": "import src.advisor",
+    "advisor (all-manual run)": _ALL_MANUAL_PATCH
+    + """
+import contextlib, io, sys
+sys.argv = ["advisor", "20000"]
+import src.advisor
+with contextlib.redirect_stdout(io.StringIO()):
+    src.advisor.main()
+""",
+}
+
+
+def _top_level_us(stderr: str) -> int:
+    # -X importtime 每行: "import time: self | cumulative | name"；顶层导入的 name 只有一个前导空格
+    total = 0
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        if not parts[2].startswith("  "):
+            total += int(parts[1])
+    return total
+
+
+def measure(code: str, repeat: int = 3, scratch: str | None = None) -> dict:
+    script = code + _REPORT_HEAVY.format(heavy=HEAVY_MODULES)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, _SCRATCH_ENV: scratch} if scratch else None
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=root,
+            env=env,
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+
+        heavy = ""
+        for line in proc.stdout.splitlines():
+            if line.startswith("HEAVY:"):
+                heavy = line[len("HEAVY:"):]
+        sample = {
+            "import_ms": _top_level_us(proc.stderr) / 1000,
+            "wall_ms": wall * 1000,
+            "heavy": [m for m in heavy.split(",") if m],
+        }
+        if best is None or sample["wall_ms"] < best["wall_ms"]:
+            best = sample
+    return best
+
+
+def report(name: str, res: dict, baseline: dict):
+    if "error" in res:
+        print(f"{name:<36}  失败: {res['error']}")
+        return
+    heavy = ",".join(res["heavy"]) or "-"
+    print(f"{name:<36}{res['import_ms'] - baseline['import_ms']:>10.1f}{res['wall_ms']:>10.1f}  {heavy}")
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for entry points")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best is reported)")
+    args = parser.parse_args()
+
+    # 解释器自身启动（site 等）的导入耗时作为基线扣除
+    baseline = measure("pass", args.repeat)
+    print(f"解释器基线（空脚本）: 导入 {baseline['import_ms']:.1f} ms | 进程 {baseline['wall_ms']:.1f} ms")
+    print(f"{'入口':<36}{'导入(ms)':>10}{'进程(ms)':>10}  重型依赖")
+    print("-" * 72)
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, code in CASES.items():
+            report(name, measure(code, args.repeat, scratch), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# 运行日志：每次运行策略 / 综合方案时，把信号、关键指标和资金方案追加写入本地 SQLite（标准库 sqlite3，无需额外依赖）。
+#   runs:    每次运行一行（时间、入口、当时生效的 MANUAL_* 手动覆盖）
+#   records: 每个标的 / 方案一行（日期、类别、标的、信号、利差、价格，以及完整的 metrics / plan JSON）
+# records 按 (target, day)、(kind, day) 和 (day) 建索引，按标的或日期范围查询多年的每日记录也是毫秒级。
+# 用法:
+#   uv run -m src.journal query 0883.HK --signal STRONG_BUY --monthly   # 出现过 STRONG_BUY 的月份
+#   uv run -m src.journal query 563020 --since 2024-01-01               # 利差历史（A股策略，相对美债）
+#   uv run -m src.journal query core_dca:563020                         # 核心定投（相对 CNY_HURDLE_RATE）
+# 同一代码在不同口径下的利差不可比：A股/港股策略（相对美债）用裸代码，核心定投与分红资产池（相对门槛利率）
+# 分别记为 core_dca:<代码> / dividend:<代码>。
+#   uv run -m src.journal runs --limit 20
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from src.config import JOURNAL_CONFIG
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    day TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    overrides TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    day TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    signal TEXT,
+    spread REAL,
+    price REAL,
+    metrics TEXT,
+    plan TEXT
+);
+CREATE INDEX IF NOT EXISTS records_target_day ON records(target, day);
+CREATE INDEX IF NOT EXISTS records_day ON records(day);
+CREATE INDEX IF NOT EXISTS records_kind_day ON records(kind, day);
+"""
+COLUMNS = ("day", "kind", "target", "signal", "spread", "price")
+PAYLOAD = ("metrics", "plan")
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    path = path or JOURNAL_CONFIG["FILE"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def active_overrides() -> dict:
+    # 扫描 src.config 里所有值不为 None 的 MANUAL_* 项（含嵌套在各配置 dict / 标的里的）
+    from src import config
+
+    out = {}
+
+    def walk(prefix: str, value):
+        if isinstance(value, dict):
+            for key, v in value.items():
+                name = f"{prefix}.{key}"
+                if str(key).startswith("MANUAL_"):
+                    if v is not None:
+                        out[name] = v
+                else:
+                    walk(name, v)
+
+    for name in dir(config):
+        value = getattr(config, name)
+        if name.startswith("MANUAL_"):
+            if value is not None:
+                out[name] = value
+        elif name.isupper():
+            walk(name, value)
+    return out
+
+
+def row(kind: str, target: str, result: dict, spread_key: str = "spread", plan: dict | None = None) -> dict:
+    # 把各策略 analyze() 的单个结果转成一条记录
+    m = result.get("metrics")
+    return {
+        "kind": kind,
+        "target": str(target),
+        "signal": result.get("signal"),
+        "spread": m.get(spread_key) if m else None,
+        "price": m.get("price") if m else None,
+        "metrics": m,
+        "plan": plan if plan is not None else result.get("plan"),
+    }
+
+
+def _dumps(value) -> str | None:
+    return None if value is None else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def record(entry: str, rows: list[dict], path: str | None = None) -> int | None:
+    # 一次运行一个事务；写入失败只记日志，不影响策略输出。返回 run id
+    if not JOURNAL_CONFIG["ENABLED"] or not rows:
+        return None
+    now = datetime.now()
+    day = now.date().isoformat()
+    try:
+        conn = connect(path)
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO runs (ts, day, entry, overrides) VALUES (?, ?, ?, ?)",
+                    (now.isoformat(timespec="seconds"), day, entry, _dumps(active_overrides())),
+                )
+                run_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO records (run_id, day, kind, target, signal, spread, price, metrics, plan)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, day, r["kind"], r["target"], r["signal"], r["spread"], r["price"],
+                         _dumps(r["metrics"]), _dumps(r["plan"]))
+                        for r in rows
+                    ],
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        log(f"运行日志写入失败: {e}")
+        return None
+    return run_id
+
+
+def query(
+    target: str | None = None,
+    kind: str | None = None,
+    signal: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    monthly: bool = False,
+    limit: int | None = None,
+    payload: bool = True,
+    path: str | None = None,
+) -> list[dict]:
+    # 按日期升序返回记录；monthly 时每个标的每月只保留最后一条（筛选条件先于分组生效）
+    # payload=False 时不读取、不解析 metrics / plan JSON，只要信号和利差时更快
+    where, params = [], []
+    for column, op, value in (
+        ("target", "=", target),
+        ("kind", "=", kind),
+        ("signal", "=", signal),
+        ("day", ">=", since),
+        ("day", "<=", until),
+    ):
+        if value is not None:
+            where.append(f"{column} {op} ?")
+            params.append(value)
+    cond = " AND ".join(where) or "1"
+    columns = COLUMNS + PAYLOAD if payload else COLUMNS
+    select = ", ".join(columns)
+
+    if monthly:
+        cond = f"rowid IN (SELECT MAX(rowid) FROM records WHERE {cond} GROUP BY target, substr(day, 1, 7))"
+    if limit:
+        # 取最近的 limit 条（按倒序取再翻转），输出仍按日期升序
+        sql = f"SELECT {select} FROM records WHERE {cond} ORDER BY day DESC, rowid DESC LIMIT ?"
+        params.append(int(limit))
+    else:
+        sql = f"SELECT {select} FROM records WHERE {cond} ORDER BY day, rowid"
+
+    conn = connect(path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    if limit:
+        rows.reverse()
+    out = []
+    for values in rows:
+        r = dict(zip(columns, values))
+        if payload:
+            r["metrics"] = json.loads(r["metrics"]) if r["metrics"] else None
+            r["plan"] = json.loads(r["plan"]) if r["plan"] else None
+        out.append(r)
+    return out
+
+
+def runs(limit: int = 20, path: str | None = None) -> list[dict]:
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT r.id, r.ts, r.entry, r.overrides, COUNT(c.rowid) FROM runs r"
+            " LEFT JOIN records c ON c.run_id = r.id GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"id": i, "ts": ts, "entry": entry, "overrides": json.loads(overrides), "records": n}
+        for i, ts, entry, overrides, n in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the local run journal (signals, metrics, plans)")
+    parser.add_argument("--file", default=None, help="Journal database (default: JOURNAL_CONFIG['FILE'])")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_query = sub.add_parser("query", help="Records for a target / kind / signal / date range")
+    p_query.add_argument("target", nargs="?", default=None, help="e.g. 563020, 0883.HK, core_dca:563020, dividend:601088, plan")
+    p_query.add_argument("--kind", default=None, help="a_share, hk_share, core_dca, dividend, advisor")
+    p_query.add_argument("--signal", default=None)
+    p_query.add_argument("--since", default=None, help="YYYY-MM-DD")
+    p_query.add_argument("--until", default=None, help="YYYY-MM-DD")
+    p_query.add_argument("--monthly", action="store_true", help="Last matching record per target and month")
+    p_query.add_argument("--limit", type=int, default=None, help="Only the most recent N records")
+    p_query.add_argument("--json", action="store_true", help="Print full records (with metrics / plan) as JSON lines")
+
+    p_runs = sub.add_parser("runs", help="Recent runs with their active MANUAL_* overrides")
+    p_runs.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "runs":
+        for r in runs(args.limit, args.file):
+            overrides = ", ".join(f"{k}={v}" for k, v in r["overrides"].items()) or "-"
+            print(f"#{r['id']:<6}{r['ts']:<21}{r['entry']:<36}{r['records']:>4} 条  覆盖: {overrides}")
+        return
+
+    t0 = time.perf_counter()
+    rows = query(
+        args.target, args.kind, args.signal, args.since, args.until, args.monthly, args.limit,
+        payload=args.json, path=args.file,
+    )
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        for r in rows:
+            print(json.dumps(r, ensure_ascii=False))
+    else:
+        print(f"{'day':<12}{'kind':<11}{'target':<10}{'signal':<12}{'spread %':>10}{'price':>10}")
+        for r in rows:
+            spread = f"{r['spread']:+.2f}" if r["spread"] is not None else "-"
+            price = f"{r['price']:.3f}" if r["price"] is not None else "-"
+            print(f"{r['day']:<12}{r['kind']:<11}{r['target']:<10}{r['signal'] or '-':<12}{spread:>10}{price:>10}")
+    log(f"{len(rows)} 条记录，查询耗时 {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# 持仓账本：买入 / 卖出 / 分红按事件追加写入 JSONL（只追加、不修改），并定期写一份紧凑快照。
+#   data/ledger/events.jsonl   每行一个事件
+#   data/ledger/snapshot.json  某个时刻的全部持仓 + 该时刻在 events.jsonl 中的字节偏移
+# 读取时先载入快照，再从偏移处 seek 过去只回放之后的少量事件，不必重扫全部历史；
+# 快照之后累计超过 SNAPSHOT_EVERY 个事件时自动写新快照。
+# 写入时对 events.jsonl 加排他锁（fcntl.flock），先追上其他进程/实例已写入的事件再编号追加，多个写入方不会互相覆盖。
+# 成本按移动加权平均法；分红只保留最近一年的明细，用于滚动 12 个月的分红收入（TTM）。
+# 用法:
+#   uv run -m src.ledger add buy 563020 --shares 10000 --price 1.25
+#   uv run -m src.ledger add dividend 563020 --amount 420 --date 2025-01-15
+#   uv run -m src.ledger add sell 0939.HK --shares 1000 --price 6.8 --account hk
+#   uv run -m src.ledger show [--account hk]
+#   uv run -m src.ledger compact
+import argparse
+import bisect
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from src import profiling
+from src.config import LEDGER_CONFIG
+
+EVENT_TYPES = ("buy", "sell", "dividend")
+SNAPSHOT_VERSION = 1
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+class Position:
+    __slots__ = ("shares", "cost", "realized", "income")
+
+    def __init__(self, shares=0.0, cost=0.0, realized=0.0, income=None):
+        self.shares = shares
+        self.cost = cost          # 当前持仓的总成本（含手续费）
+        self.realized = realized  # 已实现盈亏（卖出部分）
+        self.income = income or []  # 最近一年的分红 [(日期, 金额)]，按日期升序
+
+    def apply(self, event: dict):
+        kind = event["type"]
+        if kind == "buy":
+            self.shares += event["shares"]
+            self.cost += event["shares"] * event["price"] + event.get("fee", 0.0)
+        elif kind == "sell":
+            released = self.cost * event["shares"] / self.shares if self.shares else 0.0
+            self.realized += event["shares"] * event["price"] - event.get("fee", 0.0) - released
+            self.cost -= released
+            self.shares -= event["shares"]
+            if self.shares <= 1e-9:
+                self.shares, self.cost = 0.0, 0.0
+        else:
+            # 允许补录较早日期的分红，保持按日期有序（prune 依赖有序）
+            bisect.insort(self.income, (event["date"], event["amount"]))
+
+    def prune(self, asof: str):
+        # 只保留 asof 之前一年内的分红明细
+        cutoff = _year_before(asof)
+        i = 0
+        while i < len(self.income) and self.income[i][0] <= cutoff:
+            i += 1
+        if i:
+            del self.income[:i]
+
+    def ttm_income(self, asof: str) -> float:
+        cutoff = _year_before(asof)
+        return sum(amount for day, amount in self.income if cutoff < day <= asof)
+
+    def to_list(self) -> list:
+        return [self.shares, self.cost, self.realized, self.income]
+
+
+def _year_before(day: str) -> str:
+    return (date.fromisoformat(day) - timedelta(days=365)).isoformat()
+
+
+class Ledger:
+    def __init__(self, root: str | None = None):
+        self.root = root or LEDGER_CONFIG["DIR"]
+        self.events_path = os.path.join(self.root, "events.jsonl")
+        self.snapshot_path = os.path.join(self.root, "snapshot.json")
+        # (account, code) -> Position
+        self.positions: dict[tuple[str, str], Position] = {}
+        self.seq = 0
+        self.offset = 0
+        self.last_date = None
+        self.pending = 0  # 快照之后回放/追加的事件数
+        self._load()
+
+    # ---- 读取 ----
+
+    @profiling.timed("ledger.load")
+    def _load(self):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snap = json.load(f)
+        except FileNotFoundError:
+            snap = None
+        except (OSError, ValueError) as e:
+            log(f"账本快照读取失败，从头回放事件: {e}")
+            snap = None
+
+        size = os.path.getsize(self.events_path) if os.path.exists(self.events_path) else 0
+        # 事件文件比快照记录的还短，说明被替换或截断过，快照作废
+        if snap is not None and snap.get("version") == SNAPSHOT_VERSION and snap["offset"] <= size:
+            self.seq, self.offset, self.last_date = snap["seq"], snap["offset"], snap["last_date"]
+            for account, code, shares, cost, realized, income in snap["positions"]:
+                self.positions[(account, code)] = Position(shares, cost, realized, [tuple(x) for x in income])
+        self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.events_path):
+            return
+        with open(self.events_path, "rb") as f:
+            self._catch_up(f)
+
+    def _catch_up(self, f):
+        # 从 self.offset 起回放完整的行；停在最后一个换行处
+        f.seek(self.offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # 写到一半的最后一行（进程中断），下次加锁追加前会被截掉
+            self._apply(json.loads(line))
+            self.offset += len(line)
+            self.pending += 1
+
+    def _apply(self, event: dict):
+        key = (event["account"], event["code"])
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self.positions[key] = Position()
+        pos.apply(event)
+        self.seq = event["seq"]
+        self.last_date = max(self.last_date or event["date"], event["date"])
+
+    # ---- 写入 ----
+
+    def make_event(self, kind: str, code: str, shares: float = 0.0, price: float = 0.0,
+                   amount: float | None = None, fee: float = 0.0, account: str | None = None,
+                   day: str | None = None) -> dict:
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"未知事件类型: {kind}（可选 {', '.join(EVENT_TYPES)}）")
+        account = account or LEDGER_CONFIG["DEFAULT_ACCOUNT"]
+        day = day or date.today().isoformat()
+        date.fromisoformat(day)
+        event = {"date": day, "account": account, "code": str(code), "type": kind}
+        if kind == "dividend":
+            if amount is None or amount <= 0:
+                raise ValueError("分红事件需要正的 amount（到手现金）")
+            event["amount"] = float(amount)
+        else:
+            if shares <= 0 or price <= 0:
+                raise ValueError(f"{kind} 事件需要正的 shares 和 price")
+            held = self.positions.get((account, str(code)))
+            if kind == "sell" and (held is None or shares > held.shares + 1e-9):
+                raise ValueError(f"{account}/{code} 持有 {held.shares if held else 0:g} 份，不足以卖出 {shares:g}")
+            event.update(shares=float(shares), price=float(price), fee=float(fee))
+        return event
+
+    @contextmanager
+    def _locked(self):
+        # 加排他锁并追上文件里已有的全部完整事件；之后剩下的只可能是中断留下的半行，截掉后再追加
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.events_path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self._catch_up(f)
+                f.seek(0, os.SEEK_END)
+                if f.tell() > self.offset:
+                    f.truncate(self.offset)
+                yield f
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        if self.pending >= LEDGER_CONFIG["SNAPSHOT_EVERY"]:
+            self.snapshot()
+
+    def _write(self, f, events):
+        for event in events:
+            event = {"seq": self.seq + 1, **event}
+            line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            self._apply(event)
+            self.offset += len(line)
+            self.pending += 1
+
+    def append(self, *events: dict):
+        # 事件按传入顺序编号写入；一次调用只加一次锁、打开一次文件，批量导入时同样高效
+        with self._locked() as f:
+            self._write(f, events)
+
+    def add(self, kind: str, code: str, **kwargs) -> dict:
+        # 在锁内校验（如卖出数量不超过持仓），校验用的是包含其他写入方事件的最新持仓
+        with self._locked() as f:
+            event = self.make_event(kind, code, **kwargs)
+            self._write(f, [event])
+        return event
+
+    @profiling.timed("ledger.snapshot")
+    def snapshot(self):
+        # 清空的持仓且一年内没有分红的不再写入快照，快照大小只与当前持仓数有关
+        if self.last_date:
+            for pos in self.positions.values():
+                pos.prune(self.last_date)
+        positions = [
+            [account, code, *pos.to_list()]
+            for (account, code), pos in self.positions.items()
+            if pos.shares > 0 or pos.income
+        ]
+        snap = {
+            "version": SNAPSHOT_VERSION,
+            "seq": self.seq,
+            "offset": self.offset,
+            "last_date": self.last_date,
+            "positions": positions,
+        }
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False)
+        os.replace(tmp, self.snapshot_path)
+        self.pending = 0
+
+    # ---- 查询 ----
+
+    def holdings(self, account: str | None = None, asof: str | None = None) -> dict[str, dict]:
+        # {code: shares/cost/avg_cost/realized/ttm_income}；不指定账户时按代码合并全部账户
+        asof = asof or date.today().isoformat()
+        out = {}
+        for (acct, code), pos in self.positions.items():
+            if account is not None and acct != account:
+                continue
+            h = out.setdefault(code, {"shares": 0.0, "cost": 0.0, "realized": 0.0, "ttm_income": 0.0})
+            h["shares"] += pos.shares
+            h["cost"] += pos.cost
+            h["realized"] += pos.realized
+            h["ttm_income"] += pos.ttm_income(asof)
+        for h in out.values():
+            h["avg_cost"] = h["cost"] / h["shares"] if h["shares"] > 0 else None
+        return {code: h for code, h in out.items() if h["shares"] > 0 or h["ttm_income"] > 0}
+
+    def accounts(self) -> list[str]:
+        return sorted({account for account, _ in self.positions})
+
+
+def sell_size(shares: float, fraction: float | None = None, lot: int | None = None) -> float:
+    # SELL 信号的建议卖出数量：持仓的 fraction，向下取整到整手；不足一手时为 0
+    fraction = LEDGER_CONFIG["SELL_FRACTION"] if fraction is None else fraction
+    lot = lot or LEDGER_CONFIG["LOT_SIZE"]
+    return float(int(shares * fraction // lot) * lot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-only holdings ledger with snapshots")
+    parser.add_argument("--dir", default=None, help="Ledger directory (default: LEDGER_CONFIG['DIR'])")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="Record a buy, sell or dividend")
+    p_add.add_argument("type", choices=EVENT_TYPES)
+    p_add.add_argument("code")
+    p_add.add_argument("--shares", type=float, default=0.0)
+    p_add.add_argument("--price", type=float, default=0.0)
+    p_add.add_argument("--amount", type=float, default=None, help="Dividend cash received")
+    p_add.add_argument("--fee", type=float, default=0.0)
+    p_add.add_argument("--account", default=None)
+    p_add.add_argument("--date", default=None, help="YYYY-MM-DD (default: today)")
+
+    p_show = sub.add_parser("show", help="Current positions, cost basis and trailing dividend income")
+    p_show.add_argument("--account", default=None)
+
+    sub.add_parser("compact", help="Write a snapshot now")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    with profiling.session(args, "ledger"):
+        ledger = Ledger(args.dir)
+        if args.command == "add":
+            try:
+                event = ledger.add(
+                    args.type, args.code, shares=args.shares, price=args.price, amount=args.amount,
+                    fee=args.fee, account=args.account, day=args.date,
+                )
+            except ValueError as e:
+                parser.error(str(e))
+            log(f"已记录 #{ledger.seq}: {json.dumps(event, ensure_ascii=False)}")
+        elif args.command == "compact":
+            ledger.snapshot()
+            log(f"快照已写入: {ledger.snapshot_path}（{ledger.seq} 个事件）")
+        else:
+            holdings = ledger.holdings(args.account)
+            print(f"\n{'code':<10}{'shares':>12}{'avg cost':>11}{'cost':>14}{'realized':>12}{'TTM income':>12}{'yield/cost':>11}")
+            print("-" * 82)
+            for code, h in sorted(holdings.items()):
+                avg = f"{h['avg_cost']:.3f}" if h["avg_cost"] is not None else "-"
+                yoc = f"{h['ttm_income'] / h['cost']:.2%}" if h["cost"] > 0 else "-"
+                print(
+                    f"{code:<10}{h['shares']:>12,.0f}{avg:>11}{h['cost']:>14,.2f}{h['realized']:>12,.2f}"
+                    f"{h['ttm_income']:>12,.2f}{yoc:>11}"
+                )
+            print(f"\n账户: {', '.join(ledger.accounts()) or '-'} | 事件 {ledger.seq} 个（快照后回放 {ledger.pending} 个）")
+
+
+if __name__ == "__main__":
+    main()
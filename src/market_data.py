@@ -0,0 +1,110 @@
+# 行情数据入口：所有策略通过这里取数，统一走共享缓存。
+# 注意：MANUAL_* 手动覆盖由调用方优先判断，这里只负责“需要实时数据”时的抓取。
+# 原始抓取由 src.providers 的当前后端完成（默认 akshare / yfinance 实时接口，也可以回放本地 fixture）；
+# akshare / yfinance / pandas 导入很慢，只在真正需要联网抓取时才导入。
+from src import cache, net, profiling, providers
+from src.config import BENCHMARK_TICKER, MANUAL_US_RATE
+
+
+def _cached(source: str, symbol: str, fetch, ttl: float | None = None, day: str | None = None):
+    # 回放/录制后端不读写行情缓存：回放结果只由 fixture 决定，录制时每次都真正请求
+    if not providers.get().cacheable:
+        with profiling.stage(f"{source}:{symbol}"):
+            return fetch()
+    return cache.get_or_fetch(source, symbol, fetch, ttl=ttl, day=day)
+
+
+def get_us_rate(ttl: float | None = None) -> float:
+    if MANUAL_US_RATE is not None:
+        return float(MANUAL_US_RATE)
+    return _cached("yfinance.history", BENCHMARK_TICKER, lambda: providers.get().us_rate(), ttl=ttl)
+
+
+def get_spot_table(kind: str, ttl: float | None = None):
+    # kind: "etf"（fund_etf_spot_em）或 "stock"（stock_zh_a_spot_em）；列为 code/name/price/turnover
+    source = "akshare.fund_etf_spot_em" if kind == "etf" else "akshare.stock_zh_a_spot_em"
+    return _cached(source, "table", lambda: providers.get().spot_table(kind), ttl=ttl)
+
+
+def _fetch_etf_snapshot(ttl: float | None = None) -> dict[str, float]:
+    # 全市场 ETF 快照只保留 代码 -> 最新价 的索引，后续按代码 O(1) 查询
+    table = get_spot_table("etf", ttl)
+    return dict(zip(table["code"], table["price"].astype(float)))
+
+
+def get_etf_snapshot(ttl: float | None = None) -> dict[str, float]:
+    # TTL 内整张表最多下载一次，多个 ETF 共用同一份快照
+    return _cached("akshare.fund_etf_spot_em", "index", lambda: _fetch_etf_snapshot(ttl), ttl=ttl)
+
+
+def get_etf_price(code: str, ttl: float | None = None) -> float | None:
+    return get_etf_snapshot(ttl).get(str(code))
+
+
+def get_etf_prices(codes: list[str], ttl: float | None = None) -> dict[str, float]:
+    snapshot = get_etf_snapshot(ttl)
+    return {code: snapshot[code] for code in codes if code in snapshot}
+
+
+def get_hk_price(code: str) -> float:
+    return _cached("yfinance.quote", code, lambda: providers.get().hk_price(code))
+
+
+def get_hk_prices(codes: list[str], ttl: float | None = None, errors: dict | None = None) -> dict[str, float]:
+    # 返回 {code: price}；批量与逐个回退都失败的标的不在结果里，传入 errors 时记录 {code: FetchError}
+    errors = {} if errors is None else errors
+    provider = providers.get()
+    prices: dict[str, float] = {}
+    missing = []
+    with profiling.stage(f"yfinance.quote:{len(codes)} tickers"):
+        for code in codes:
+            hit, value = (
+                cache.get(cache.make_key("yfinance.quote", code), ttl) if provider.cacheable else (False, None)
+            )
+            profiling.record(hit=hit)
+            if hit:
+                prices[code] = value
+            else:
+                missing.append(code)
+
+        if missing:
+            # 批量下载失败不致命：下面逐个回退，单票的失败原因会覆盖批量的原因
+            try:
+                with profiling.stage("yfinance.download"):
+                    fetched = provider.hk_closes(missing)
+            except Exception:
+                fetched = {}
+
+            # 批量结果里缺失的标的，才逐个回退到单票接口
+            for code in missing:
+                if code not in fetched:
+                    try:
+                        with profiling.stage(f"yfinance.Ticker:{code}"):
+                            fetched[code] = provider.hk_price(code)
+                    except Exception as e:
+                        errors[code] = net.as_fetch_error(e, "yfinance.quote", code)
+                        continue
+                if provider.cacheable:
+                    profiling.record(cache.put(cache.make_key("yfinance.quote", code), fetched[code]))
+                prices[code] = fetched[code]
+
+    return prices
+
+
+def get_dividend_plans(period: str, ttl: float = 7 * 24 * 3600):
+    # 全市场个股某个报告期（如 20241231）的分红方案；历史报告期基本不再变化，缓存时间更长
+    return _cached(
+        "akshare.stock_fhps_em", period, lambda: providers.get().dividend_plans(period), ttl=ttl, day=period
+    )
+
+
+# ---- 原始历史数据（不走缓存，供本地历史库 src.history_store 增量更新）----
+
+def fetch_price_history(symbol: str, start: str, end: str):
+    # 返回 date/close 两列
+    return providers.get().price_history(symbol, start, end)
+
+
+def fetch_dividend_events(symbol: str):
+    # 返回 date/amount 两列：权益登记日（yfinance 为除息日）与每股/每份现金分红
+    return providers.get().dividend_events(symbol)
@@ -0,0 +1,205 @@
+# 网络层：所有联网抓取共用的连接池、有限重试与对冲请求，失败统一转成带原因的 FetchError。
+# - session():      进程内共享的 requests.Session（连接池 + keep-alive）；install_pool() 让 akshare 的
+#                   requests.get/post 也走这个连接池，并补上默认超时（akshare 多数接口不传超时）
+# - retry():        按失败原因有限重试，指数退避 + 抖动；404、解析失败等不会因重试而好转的错误立即返回
+# - hedged():       主数据源超过 HEDGE_AFTER 秒未返回时并发请求备用源，先成功者为准，压低尾延迟
+# - yahoo_quote():  直连 Yahoo chart 接口取最新价，作为 yfinance 的备用源；地址可在 NET_CONFIG 里改成本地桩服务
+# yfinance 自带共享会话（curl_cffi），不接受外部 requests.Session，因此只对它做重试与对冲。
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeout, wait
+from urllib.parse import quote
+
+from src import profiling
+from src.config import NET_CONFIG
+
+# 重试可能恢复的失败原因；其余（http_404、parse、empty 等）重试也不会好转
+RETRYABLE = {"timeout", "connection", "rate_limited", "http_429", "http_5xx"}
+
+
+class FetchError(Exception):
+    # source/symbol: 哪个接口、哪个标的；reason: 机器可读的失败原因；attempts: 实际请求次数
+    def __init__(self, source: str, symbol: str, reason: str, attempts: int = 1, detail: str = ""):
+        self.source = source
+        self.symbol = symbol
+        self.reason = reason
+        self.attempts = attempts
+        self.detail = detail
+        msg = f"{source}:{symbol} {reason}"
+        if attempts > 1:
+            msg += f"（共 {attempts} 次）"
+        if detail:
+            msg += f": {detail}"
+        super().__init__(msg)
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "symbol": self.symbol,
+            "reason": self.reason,
+            "attempts": self.attempts,
+            "detail": self.detail,
+        }
+
+
+def reason_of(exc: BaseException) -> str:
+    # 按异常类名判断，requests 与 curl_cffi（yfinance）的异常都能识别，且不必导入它们
+    if isinstance(exc, FetchError):
+        return exc.reason
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & {"Timeout", "TimeoutError", "ReadTimeout", "ConnectTimeout"}:
+        return "timeout"
+    if "YFRateLimitError" in names:
+        return "rate_limited"
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return "http_5xx" if status >= 500 else f"http_{status}"
+    if isinstance(exc, OSError):
+        return "connection"
+    if isinstance(exc, IndexError):
+        return "empty"
+    if isinstance(exc, (KeyError, ValueError, TypeError)):
+        return "parse"
+    return "error"
+
+
+def as_fetch_error(exc: BaseException, source: str, symbol: str) -> FetchError:
+    if isinstance(exc, FetchError):
+        return exc
+    return FetchError(source, symbol, reason_of(exc), detail=f"{type(exc).__name__}: {exc}")
+
+
+def spawn(fn) -> Future:
+    # 用守护线程执行：超时的请求不会在进程退出时被 join 而卡住
+    fut = Future()
+
+    def worker():
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return fut
+
+
+def retry(fn, source: str, symbol: str, attempts: int | None = None, backoff: float | None = None):
+    attempts = NET_CONFIG["RETRIES"] if attempts is None else attempts
+    backoff = NET_CONFIG["BACKOFF"] if backoff is None else backoff
+    for i in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            reason = reason_of(e)
+            if i == attempts or reason not in RETRYABLE:
+                err = as_fetch_error(e, source, symbol)
+                raise FetchError(source, symbol, reason, i, err.detail) from e
+            time.sleep(backoff * 2 ** (i - 1) * (1 + random.random() / 2))
+
+
+def hedged(primary, fallback, source: str, symbol: str, budget: float | None = None, timeout: float | None = None):
+    # 主源先跑 budget 秒；超时或失败后启动备用源，两者赛跑，先成功者为准。
+    # 备用源启动后最多再等 timeout 秒；都失败时抛出 FetchError，detail 里列出两边的原因
+    budget = NET_CONFIG["HEDGE_AFTER"] if budget is None else budget
+    timeout = NET_CONFIG["TIMEOUT"] if timeout is None else timeout
+
+    pending = {spawn(profiling.bind(primary)): "primary"}
+    errors = {}
+    done, _ = wait(pending, timeout=budget)
+    for fut in done:
+        try:
+            return fut.result()
+        except Exception as e:
+            errors[pending.pop(fut)] = e
+
+    with profiling.stage(f"hedge:{source}:{symbol}"):
+        pending[spawn(profiling.bind(fallback))] = "fallback"
+        deadline = time.monotonic() + timeout
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                label = pending.pop(fut)
+                try:
+                    return fut.result()
+                except Exception as e:
+                    errors[label] = e
+
+    for label in pending.values():
+        errors[label] = FutureTimeout(f"{budget + timeout:.1f}s 内未返回")
+    legs = {label: as_fetch_error(e, source, symbol) for label, e in errors.items()}
+    reason = (legs.get("primary") or legs["fallback"]).reason
+    detail = "; ".join(
+        f"{label} {err.reason}" + (f" x{err.attempts}" if err.attempts > 1 else "") for label, err in legs.items()
+    )
+    raise FetchError(source, symbol, reason, sum(err.attempts for err in legs.values()), detail)
+
+
+# ---- 连接池 ----
+
+_session = None
+_session_lock = threading.Lock()
+_pool_installed = False
+
+
+def session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            from http.cookiejar import DefaultCookiePolicy
+
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=NET_CONFIG["POOL_SIZE"], pool_maxsize=NET_CONFIG["POOL_SIZE"])
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["User-Agent"] = NET_CONFIG["USER_AGENT"]
+            # 不在请求之间保留 cookie，与 requests.get 每次新建会话时的行为一致
+            s.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _session = s
+    return _session
+
+
+def install_pool():
+    # 把 requests.get/post 换成共享会话上的同名方法；akshare 在调用时才查找 requests.get，因此替换后即生效
+    global _pool_installed
+    if _pool_installed or not NET_CONFIG["POOL_REQUESTS"]:
+        return
+    import requests
+
+    s = session()
+
+    def get(url, params=None, **kwargs):
+        kwargs.setdefault("timeout", NET_CONFIG["TIMEOUT"])
+        return s.get(url, params=params, **kwargs)
+
+    def post(url, data=None, json=None, **kwargs):
+        kwargs.setdefault("timeout", NET_CONFIG["TIMEOUT"])
+        return s.post(url, data=data, json=json, **kwargs)
+
+    requests.get, requests.post = get, post
+    _pool_installed = True
+
+
+def get_json(url: str, params: dict | None = None, timeout: float | None = None):
+    resp = session().get(url, params=params, timeout=timeout or NET_CONFIG["TIMEOUT"])
+    resp.raise_for_status()
+    return resp.json()
+
+
+def yahoo_quote(symbol: str) -> float:
+    url = NET_CONFIG["YAHOO_CHART_URL"].format(symbol=quote(symbol, safe=""))
+    data = get_json(url, params={"range": "5d", "interval": "1d"})
+    try:
+        price = data["chart"]["result"][0]["meta"].get("regularMarketPrice")
+    except (KeyError, IndexError, TypeError) as e:
+        raise FetchError("yahoo.chart", symbol, "parse", detail=f"{type(e).__name__}: {e}") from e
+    if not price:
+        raise FetchError("yahoo.chart", symbol, "empty")
+    return float(price)
@@ -0,0 +1,123 @@
+# 单进程运行多个策略：一次解释器启动、一次 akshare / yfinance 导入，美债基准只抓取一次。
+# 先并发预热共享缓存（美债 / A股 / 港股，与 advisor 同一套超时），再按顺序输出各策略报告，最后打印信号汇总。
+# 用法:
+#   uv run -m src.orchestrator                                  # 默认 a_share + hk_share（原 run.sh）
+#   uv run -m src.orchestrator a_share hk_share core_dca dividend advisor --amount 20000
+import argparse
+import time
+from datetime import datetime
+
+from src import profiling
+
+# name -> (标题, 是否需要 --amount)
+STRATEGIES = {
+    "a_share": ("A股红利 ETF vs 美债", False),
+    "hk_share": ("港股红利 vs 美债", False),
+    "core_dca": ("核心定投", True),
+    "dividend": ("A股分红资产池", False),
+    "advisor": ("综合方案", True),
+}
+DEFAULT_SELECTION = ("a_share", "hk_share")
+# 需要实时行情、可以共用预热结果的策略
+_LIVE = {"a_share", "hk_share", "advisor"}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def _run_one(name: str, amount: float | None):
+    if name == "a_share":
+        from src.strategy_a_share import run
+        run()
+    elif name == "hk_share":
+        from src.strategy_hk_us import run
+        run()
+    elif name == "core_dca":
+        from src.strategy_core_dca import run
+        run(amount)
+    elif name == "dividend":
+        from src.strategy_a_share_dividend_targets import run
+        run()
+    elif name == "advisor":
+        from src.advisor import run
+        run(amount)
+
+
+def summary(selection) -> list[str]:
+    # 预热后的 analyze 只读内存缓存，汇总几乎不花时间
+    lines = []
+    if "a_share" in selection or "advisor" in selection:
+        from src.strategy_a_share import analyze
+
+        lines.append(f"A股: {analyze()['signal']}")
+    if "hk_share" in selection or "advisor" in selection:
+        from src.signals import strongest
+        from src.strategy_hk_us import analyze
+
+        res = analyze()
+        detail = ", ".join(f"{code} {r['signal']}" for code, r in res.items())
+        lines.append(f"港股: {strongest(r['signal'] for r in res.values())} (综合) | {detail}")
+    if "core_dca" in selection:
+        from src.strategy_core_dca import analyze
+
+        lines.append(f"核心定投: {analyze(0.0)['signal']}")
+    if "dividend" in selection:
+        from src.strategy_a_share_dividend_targets import analyze
+
+        lines.append("分红资产池: " + ", ".join(f"{code} {r['signal']}" for code, r in analyze().items()))
+    return lines
+
+
+def run(selection, amount: float | None = None):
+    start = time.monotonic()
+
+    if _LIVE & set(selection):
+        from src.advisor import gather_signals
+
+        _, timed_out, errors, elapsed = gather_signals()
+        log(f"行情预热完成: {elapsed:.2f}s")
+        for name in timed_out:
+            log(f"⏱️ 数据源超时: {name}（相关策略会再次尝试抓取）")
+        for name, e in errors.items():
+            log(f"❌ 数据源失败: {name} -> {e}")
+
+    for name in selection:
+        try:
+            _run_one(name, amount)
+        except Exception as e:
+            log(f"{STRATEGIES[name][0]} 运行失败: {e}")
+
+    print("\n" + "=" * 40)
+    print("📋 信号汇总:")
+    for line in summary(selection):
+        print(f"   - {line}")
+    print(f"   (总耗时 {time.monotonic() - start:.2f}s)")
+    print("=" * 40)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several strategies in one process with shared market data")
+    parser.add_argument(
+        "strategies",
+        nargs="*",
+        help=f"Strategies to run, in order: {', '.join(STRATEGIES)} (default: {' '.join(DEFAULT_SELECTION)})",
+    )
+    parser.add_argument("--amount", type=float, default=None, help="Monthly funds for core_dca / advisor")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    selection = list(dict.fromkeys(args.strategies or DEFAULT_SELECTION))
+    unknown = [name for name in selection if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+    needs_amount = [name for name in selection if STRATEGIES[name][1]]
+    if needs_amount and args.amount is None:
+        parser.error(f"--amount is required for: {', '.join(needs_amount)}")
+
+    with profiling.session(args, "orchestrator"):
+        run(selection, args.amount)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# 阶段耗时统计：记录每个阶段的耗时、抓取字节数与缓存命中情况，按调用层级组织成树。
+# 默认关闭：stage() 只判断一次全局开关并返回共享的空上下文，record() 直接返回，可常驻在生产路径里。
+# 开启后（各入口的 --profile / --profile-json）：
+# - 运行期首次导入的包（akshare / yfinance / pandas ...）记为 "import <name>" 阶段
+# - cache.get_or_fetch 的每次取数记为 "<source>:<symbol>" 阶段，附带 hit/miss 与缓存序列化字节数
+# - 多线程并发取数时，用 bind() 包装的任务挂在发起线程的当前阶段下
+import builtins
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_root = None
+_local = threading.local()
+_NULL = nullcontext()
+_builtin_import = builtins.__import__
+
+
+class Stage:
+    __slots__ = ("name", "start", "duration", "bytes", "hits", "misses", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+        self.duration = 0.0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.children: list[Stage] = []
+
+    def __enter__(self):
+        stack = _stack()
+        stack[-1].children.append(self)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        _stack().pop()
+        return False
+
+    def to_dict(self) -> dict:
+        out = {"name": self.name, "ms": round(self.duration * 1000, 3)}
+        if self.bytes:
+            out["bytes"] = self.bytes
+        if self.hits or self.misses:
+            out["cache"] = {"hit": self.hits, "miss": self.misses}
+        if self.children:
+            out["children"] = [c.to_dict() for c in self.children]
+        return out
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = [_root]
+    return stack
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def stage(name: str):
+    if not _enabled:
+        return _NULL
+    return Stage(name)
+
+
+def timed(name: str):
+    # 装饰器版 stage()：关闭时只多一次布尔判断
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def record(nbytes: int = 0, hit: bool | None = None):
+    # 给当前阶段累加字节数 / 缓存命中次数
+    if not _enabled:
+        return
+    node = _stack()[-1]
+    node.bytes += nbytes
+    if hit is True:
+        node.hits += 1
+    elif hit is False:
+        node.misses += 1
+
+
+def bind(fn):
+    # 让 fn 在其他线程里执行时，阶段挂在当前线程的当前阶段下
+    if not _enabled:
+        return fn
+    parent = _stack()[-1]
+
+    def wrapper(*args, **kwargs):
+        _local.stack = [parent]
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # 只记录最外层的首次导入（其间连带导入的子模块计入该阶段，不再逐个展开）
+    if level or getattr(_local, "importing", False) or name.partition(".")[0] in sys.modules:
+        return _builtin_import(name, globals, locals, fromlist, level)
+    _local.importing = True
+    try:
+        with stage(f"import {name}"):
+            return _builtin_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.importing = False
+
+
+def enable(name: str = "total"):
+    global _enabled, _root
+    _root = Stage(name)
+    _root.start = time.perf_counter()
+    _local.stack = [_root]
+    _enabled = True
+    builtins.__import__ = _timed_import
+
+
+def disable() -> Stage | None:
+    global _enabled
+    if not _enabled:
+        return None
+    builtins.__import__ = _builtin_import
+    _enabled = False
+    _root.duration = time.perf_counter() - _root.start
+    return _root
+
+
+def format_tree(node: Stage, depth: int = 0) -> list[str]:
+    label = "  " * depth + node.name
+    extra = []
+    if node.hits or node.misses:
+        extra.append(f"hit {node.hits}/miss {node.misses}")
+    if node.bytes:
+        extra.append(f"{node.bytes / 1024:,.1f} KB")
+    lines = [f"{label:<56} {node.duration * 1000:>10.1f} ms  {' | '.join(extra)}".rstrip()]
+    for child in node.children:
+        lines.extend(format_tree(child, depth + 1))
+    return lines
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="Print a stage timing tree at exit")
+    parser.add_argument("--profile-json", metavar="PATH", default=None, help="Write the stage timing tree as JSON")
+
+
+@contextmanager
+def session(args, name: str = "total"):
+    # 入口用法：with profiling.session(args, "advisor"): run(...)
+    if not (getattr(args, "profile", False) or getattr(args, "profile_json", None)):
+        yield
+        return
+
+    enable(name)
+    try:
+        yield
+    finally:
+        root = disable()
+        if args.profile:
+            print("\n=== 阶段耗时 ===")
+            print("\n".join(format_tree(root)))
+        if args.profile_json:
+            with open(args.profile_json, "w", encoding="utf-8") as f:
+                json.dump(root.to_dict(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,252 @@
+# 核心定投的长期现金流推演：按 strategy_core_dca 的同一套档位（classify_level_array + EQUITY_BY_LEVEL）
+# 逐月分配新增资金，分红全部再投入红利权益，批量模拟成千上万条“股息率 + 每股分红”路径，
+# 估计每月分红收入首次覆盖负债利息（LIABILITY * CNY_HURDLE_RATE / 12）的月份。
+# 所有路径一起按 (月份, 路径) 数组计算；再投入的份额递推用累乘/累加的闭式解，30 年 × 1 万条路径也只需一两秒。
+#
+# 路径模型（按月）：
+# - 对数股息率：围绕 YIELD_MEAN 的均值回归过程（YIELD_REVERSION / YIELD_VOL），起点为当前决策口径的股息率
+# - 每股分红：对数正态随机游走，年化增长 DIV_GROWTH、波动 DIV_VOL
+# - 价格 = 每股分红 / 股息率；每股分红的绝对水平不影响结果，统一从 1 开始
+# - 防御/现金类部分按 DEFENSE_RATE 滚存，只报告余额，不计入分红收入
+# 同时按固定 EQUITY_BASE 比例推演一遍作为对照，看档位调节对达标时间的影响。
+# 用法:
+#   uv run -m src.strategy_core_dca 20000 --project 20 [--paths 10000] [--seed 42] [--liability 1500000]
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src import profiling
+from src.config import CNY_HURDLE_RATE, CORE_DCA_CONFIG, PROJECTION_CONFIG
+from src.signals import LEVELS, classify_level_array
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def equity_ratios() -> np.ndarray:
+    # 按 LEVELS 编码排列的权益比例，与 strategy_core_dca.decide_equity_ratio 一致
+    from src.strategy_core_dca import EQUITY_BY_LEVEL
+
+    return np.asarray([CORE_DCA_CONFIG[EQUITY_BY_LEVEL[level]] for level in LEVELS], dtype="float64")
+
+
+def start_yield() -> float | None:
+    # 当前决策口径的股息率（%）：MANUAL_INDEX_YIELD 优先，否则用 MANUAL_PRICE + MANUAL_TTM_DIV
+    from src.strategy_core_dca import get_a_share_inputs
+
+    price, ttm_div, index_yield = get_a_share_inputs()
+    if index_yield is not None:
+        return index_yield
+    if price and ttm_div and price > 0:
+        return ttm_div / price * 100
+    return None
+
+
+def model_from_config(yield0: float | None = None) -> dict:
+    cfg = PROJECTION_CONFIG
+    yield0 = start_yield() if yield0 is None else yield0
+    mean = cfg["YIELD_MEAN"] if cfg["YIELD_MEAN"] is not None else yield0
+    # 没有当前股息率时从长期均值起步
+    yield0 = mean if yield0 is None else yield0
+    if yield0 is None:
+        raise ValueError(
+            "缺少起始股息率：请在 src/config.py 填写 A_SHARE_CONFIG 的 MANUAL_INDEX_YIELD"
+            "（或 MANUAL_PRICE+MANUAL_TTM_DIV），或设置 PROJECTION_CONFIG['YIELD_MEAN']。"
+        )
+    return {
+        "yield0": float(yield0),
+        "yield_mean": float(mean),
+        "yield_vol": cfg["YIELD_VOL"],
+        "reversion": cfg["YIELD_REVERSION"],
+        "div_growth": cfg["DIV_GROWTH"],
+        "div_vol": cfg["DIV_VOL"],
+    }
+
+
+@profiling.timed("projection.draw")
+def draw(model: dict, months: int, n: int, rng) -> dict:
+    # 返回 (months, n) 的股息率（小数）与每股分红路径
+    dt = 1 / 12
+    mu = np.log(model["yield_mean"] / 100)
+    kappa = model["reversion"]
+    # OU 过程的精确离散化：x_t = mu + a (x_{t-1} - mu) + sd * eps
+    a = np.exp(-kappa * dt)
+    sd = model["yield_vol"] * np.sqrt((1 - a * a) / (2 * kappa)) if kappa > 0 else model["yield_vol"] * np.sqrt(dt)
+
+    log_yield = np.empty((months, n))
+    x = np.full(n, np.log(model["yield0"] / 100))
+    shocks = rng.standard_normal((months, n))
+    for t in range(months):
+        x = mu + a * (x - mu) + sd * shocks[t]
+        log_yield[t] = x
+
+    drift = (model["div_growth"] - model["div_vol"] ** 2 / 2) * dt
+    dps = rng.standard_normal((months, n))
+    dps *= model["div_vol"] * np.sqrt(dt)
+    dps += drift
+    np.cumsum(dps, axis=0, out=dps)
+    np.exp(dps, out=dps)
+    return {"yield": np.exp(log_yield), "dps": dps}
+
+
+def contributions(monthly_amount: float, months: int) -> np.ndarray:
+    # (months, 1)：每满 12 个月按 CONTRIBUTION_GROWTH 上调一次
+    years = np.arange(months) // 12
+    return (monthly_amount * (1 + PROJECTION_CONFIG["CONTRIBUTION_GROWTH"]) ** years)[:, None]
+
+
+def accumulate(paths: dict, equity_amount: np.ndarray) -> np.ndarray:
+    # 分红再投入后的每月分红收入 (months, n)。
+    # 份额递推 shares_t = shares_{t-1} * (1 + y_t / 12) + buy_t / price_t，
+    # 令 G_t = prod(1 + y_k / 12)，则 shares_t = G_t * cumsum(buy / price / G)
+    y, dps = paths["yield"], paths["dps"]
+    growth = np.cumprod(1 + y / 12, axis=0)
+    shares = equity_amount * y / dps  # buy / price，price = dps / y
+    shares /= growth
+    np.cumsum(shares, axis=0, out=shares)
+    shares *= growth
+    shares *= dps / 12
+    return shares
+
+
+def first_crossing(income: np.ndarray, target: float) -> np.ndarray:
+    # 每条路径首次达到目标的月份（从 1 开始）；期内未达到记为 inf
+    hit = income >= target
+    month = np.argmax(hit, axis=0).astype("float64") + 1
+    month[~hit.any(axis=0)] = np.inf
+    return month
+
+
+@profiling.timed("projection.simulate")
+def simulate(paths: dict, monthly_amount: float, target: float) -> dict:
+    y = paths["yield"]
+    months, n = y.shape
+    contrib = contributions(monthly_amount, months)
+
+    levels = classify_level_array(y * 100 - CNY_HURDLE_RATE, CORE_DCA_CONFIG["SPREAD_THRESHOLDS"])
+    equity = contrib * equity_ratios()[levels]
+    income = accumulate(paths, equity)
+
+    # 防御/现金类：D_t = D_{t-1} * (1 + r) + 当月投入，r 为月利率
+    r = PROJECTION_CONFIG["DEFENSE_RATE"] / 100 / 12
+    compound = (1 + r) ** np.arange(1, months + 1)[:, None]
+    defense = np.cumsum((contrib - equity) / compound, axis=0) * compound
+
+    base = accumulate(paths, np.broadcast_to(contrib * CORE_DCA_CONFIG["EQUITY_BASE"], (months, n)))
+    return {
+        "income": income,
+        "defense": defense,
+        "equity_in": equity,
+        "levels": levels,
+        "crossing": first_crossing(income, target),
+        "crossing_base": first_crossing(base, target),
+        "invested": np.cumsum(contrib[:, 0]),
+    }
+
+
+def summarize(sim: dict, paths: dict, target: float) -> dict:
+    months, n = sim["income"].shape
+    quantiles = (10, 50, 90)
+    # 期末权益市值 = 份额 * 价格 = 月分红 * 12 / 股息率
+    equity_value = sim["income"] * 12 / paths["yield"]
+
+    step = PROJECTION_CONFIG["REPORT_EVERY_YEARS"] * 12
+    checkpoints = sorted({*range(step, months + 1, step), months})
+    years = []
+    for m in checkpoints:
+        i = m - 1
+        years.append({
+            "month": m,
+            "invested": float(sim["invested"][i]),
+            "crossed": float((sim["crossing"] <= m).mean()),
+            "crossed_base": float((sim["crossing_base"] <= m).mean()),
+            "income": np.percentile(sim["income"][i], quantiles).tolist(),
+            "equity_value": float(np.median(equity_value[i])),
+            "defense": float(np.median(sim["defense"][i])),
+        })
+
+    return {
+        "paths": n,
+        "months": months,
+        "target": target,
+        "crossing": np.percentile(sim["crossing"], quantiles, method="higher").tolist(),
+        "crossing_base": np.percentile(sim["crossing_base"], quantiles, method="higher").tolist(),
+        "never": float(np.isinf(sim["crossing"]).mean()),
+        "levels": (np.bincount(sim["levels"].ravel(), minlength=len(LEVELS)) / sim["levels"].size).tolist(),
+        "equity_share": float(sim["equity_in"].sum() / sim["invested"][-1] / n),
+        "years": years,
+        "quantiles": quantiles,
+    }
+
+
+def _when(month: float) -> str:
+    if np.isinf(month):
+        return "期内未达到"
+    month = int(np.ceil(month))
+    return f"第 {month} 个月（{month / 12:.1f} 年）"
+
+
+def report(summary: dict, model: dict, monthly_amount: float, liability: float, elapsed: dict):
+    years = summary["months"] // 12
+    print(f"\n=== 核心定投现金流推演: {years} 年 × {summary['paths']:,} 条路径 | 每月新增 {monthly_amount:,.2f} ===")
+    print(
+        f"股息率: 起点 {model['yield0']:.2f}% → 均值 {model['yield_mean']:.2f}%（波动 {model['yield_vol']:.0%}，"
+        f"回归 {model['reversion']:.2f}/年）| 每股分红增长 {model['div_growth']:.1%} ± {model['div_vol']:.0%}"
+    )
+    print(
+        f"目标: 每月分红 ≥ {summary['target']:,.2f}"
+        f"（负债 {liability:,.0f} × 门槛 {CNY_HURDLE_RATE:.2f}% / 12）"
+    )
+    levels = " | ".join(f"{name} {p:.0%}" for name, p in zip(LEVELS, summary["levels"]))
+    print(f"档位分布: {levels} | 新增资金平均权益占比 {summary['equity_share']:.1%}")
+    print("-" * 60)
+
+    q = summary["quantiles"]
+    print("⏱️ 月分红首次覆盖目标:")
+    for label, key in (("档位调节", "crossing"), (f"固定 {CORE_DCA_CONFIG['EQUITY_BASE']:.0%}", "crossing_base")):
+        parts = " | ".join(f"p{p}: {_when(m)}" for p, m in zip(q, summary[key]))
+        print(f"   {label:<8}{parts}")
+    if summary["never"] > 0:
+        print(f"   {summary['never']:.1%} 的路径在 {years} 年内未达到")
+
+    print(f"\n{'年':>4}{'累计投入':>14}{'达标概率':>10}{'(固定)':>9}" + "".join(f"{f'月分红 p{p}':>14}" for p in q) + f"{'权益市值 p50':>15}{'防御 p50':>13}")
+    for row in summary["years"]:
+        print(
+            f"{row['month'] // 12:>4}{row['invested']:>14,.0f}{row['crossed']:>10.1%}{row['crossed_base']:>9.1%}"
+            + "".join(f"{v:>14,.0f}" for v in row["income"])
+            + f"{row['equity_value']:>15,.0f}{row['defense']:>13,.0f}"
+        )
+    print(f"\n(抽样 {elapsed['draw'] * 1000:.0f} ms | 推演 {elapsed['simulate'] * 1000:.0f} ms)")
+
+
+def run(
+    monthly_amount: float,
+    years: int | None = None,
+    paths: int | None = None,
+    seed: int | None = None,
+    liability: float | None = None,
+) -> dict | None:
+    cfg = PROJECTION_CONFIG
+    years = cfg["YEARS"] if years is None else years
+    paths = cfg["PATHS"] if paths is None else paths
+    liability = cfg["LIABILITY"] if liability is None else liability
+    target = liability * CNY_HURDLE_RATE / 100 / 12
+
+    try:
+        model = model_from_config()
+    except ValueError as e:
+        log(str(e))
+        return None
+
+    rng = np.random.default_rng(seed)
+    t0 = time.perf_counter()
+    drawn = draw(model, years * 12, paths, rng)
+    t1 = time.perf_counter()
+    sim = simulate(drawn, monthly_amount, target)
+    summary = summarize(sim, drawn, target)
+    t2 = time.perf_counter()
+
+    report(summary, model, monthly_amount, liability, {"draw": t1 - t0, "simulate": t2 - t1})
+    return summary
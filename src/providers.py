@@ -0,0 +1,289 @@
+# 数据源后端：行情、分红、美债基准的原始抓取都经由这里，market_data 只负责缓存与对外接口。
+# - LiveProvider:      akshare / yfinance 实时接口
+# - FixtureProvider:   从本地文件回放录制好的响应，完全离线、结果确定，用于基准测试与回归对比
+# - RecordingProvider: 包装另一个后端，把每次响应原样写成 fixture 文件
+# 由 PROVIDER_CONFIG["BACKEND"] 选择，或在代码里用 providers.use(...) 切换。
+# fixture 文件按 <DIR>/<方法名>/<参数>.pkl 存放，参数相同即命中；回放与录制都不经过行情缓存。
+# LiveProvider 的每次请求都经过 src.net：有限重试、yfinance 报价与备用源对冲，失败时抛出带原因的 FetchError。
+import os
+import pickle
+import re
+import threading
+
+from src import net
+from src.config import BENCHMARK_TICKER, PROVIDER_CONFIG
+
+
+class FixtureMissing(LookupError):
+    pass
+
+
+def symbol_source(symbol: str) -> str:
+    # 纯数字代码视为 A股：5/1 开头为场内 ETF，其余为个股；其它（如 0939.HK、^IRX）走 yfinance
+    if not symbol.isdigit():
+        return "yfinance"
+    return "etf" if symbol[0] in "15" else "stock"
+
+
+def _akshare():
+    # akshare 的 HTTP 请求改走共享连接池（只在第一次导入时替换一次）
+    import akshare as ak
+
+    net.install_pool()
+    return ak
+
+
+class LiveProvider:
+    name = "live"
+    cacheable = True
+
+    # ---- 实时行情 ----
+
+    def us_rate(self) -> float:
+        def primary():
+            import yfinance as yf
+
+            us_ticker = yf.Ticker(BENCHMARK_TICKER)
+            # 加上 verify=False 或 proxy 如果在内网环境受限
+            return float(us_ticker.history(period="1d")['Close'].iloc[-1])
+
+        return self._hedged_quote(primary, "yfinance.history", BENCHMARK_TICKER)
+
+    def spot_table(self, kind: str):
+        import pandas as pd
+
+        ak = _akshare()
+
+        # 全市场快照只保留筛选需要的列，控制缓存与内存占用
+        fetch = ak.fund_etf_spot_em if kind == "etf" else ak.stock_zh_a_spot_em
+        raw = net.retry(fetch, f"akshare.{fetch.__name__}", "table")
+        table = pd.DataFrame(
+            {
+                "code": raw['代码'].astype(str),
+                "name": raw['名称'].astype(str),
+                "price": pd.to_numeric(raw['最新价'], errors="coerce"),
+                "turnover": pd.to_numeric(raw['成交额'], errors="coerce"),
+            }
+        )
+        return table.dropna(subset=["price"]).reset_index(drop=True)
+
+    def hk_price(self, code: str) -> float:
+        def primary():
+            import yfinance as yf
+
+            ticker = yf.Ticker(code)
+            price = ticker.fast_info.last_price
+            if not price:
+                price = ticker.history(period="1d")['Close'].iloc[-1]
+            return float(price)
+
+        return self._hedged_quote(primary, "yfinance.quote", code)
+
+    def _hedged_quote(self, primary, source: str, symbol: str) -> float:
+        # yfinance 为主、Yahoo chart 直连为备用，两边各自有限重试
+        return net.hedged(
+            lambda: net.retry(primary, source, symbol),
+            lambda: net.retry(lambda: net.yahoo_quote(symbol), "yahoo.chart", symbol),
+            source,
+            symbol,
+        )
+
+    def hk_closes(self, codes: list[str]) -> dict[str, float]:
+        import pandas as pd
+        import yfinance as yf
+
+        # 一次请求批量下载全部标的；取每个标的最近一个有效收盘价
+        data = net.retry(
+            lambda: yf.download(codes, period="5d", interval="1d", progress=False, auto_adjust=False, threads=True),
+            "yfinance.download",
+            f"{len(codes)} tickers",
+        )
+        if data is None or data.empty or "Close" not in data:
+            return {}
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(codes[0])
+        last = closes.ffill().iloc[-1]
+        return {code: float(v) for code, v in last.items() if pd.notna(v) and v > 0}
+
+    # ---- 分红 ----
+
+    def dividend_plans(self, period: str):
+        import pandas as pd
+
+        ak = _akshare()
+        df = net.retry(lambda: ak.stock_fhps_em(date=period), "akshare.stock_fhps_em", period)
+        out = pd.DataFrame(
+            {
+                "code": df['代码'].astype(str),
+                "date": pd.to_datetime(df['股权登记日'], errors="coerce"),
+                # 现金分红比例口径为“每10股”
+                "amount": pd.to_numeric(df['现金分红-现金分红比例'], errors="coerce") / 10,
+            }
+        ).dropna()
+        return out[out["amount"] > 0].reset_index(drop=True)
+
+    # ---- 历史数据 ----
+
+    def price_history(self, symbol: str, start: str, end: str):
+        # 返回 date/close 两列
+        import pandas as pd
+
+        source = symbol_source(symbol)
+        if source == "yfinance":
+            closes = self._yf_closes([symbol], start, end)[symbol].dropna()
+            return pd.DataFrame({"date": closes.index, "close": closes.to_numpy(dtype="float64")})
+
+        ak = _akshare()
+        hist_fn = ak.fund_etf_hist_em if source == "etf" else ak.stock_zh_a_hist
+        df = net.retry(
+            lambda: hist_fn(
+                symbol=symbol,
+                period="daily",
+                start_date=start.replace("-", ""),
+                end_date=end.replace("-", ""),
+                adjust="",
+            ),
+            f"akshare.{hist_fn.__name__}",
+            symbol,
+        )
+        return pd.DataFrame(
+            {"date": pd.to_datetime(df['日期']), "close": pd.to_numeric(df['收盘'], errors="coerce")}
+        ).dropna()
+
+    def dividend_events(self, symbol: str):
+        # 返回 date/amount 两列：权益登记日（yfinance 为除息日）与每股/每份现金分红
+        import pandas as pd
+
+        source = symbol_source(symbol)
+        if source == "yfinance":
+            import yfinance as yf
+
+            divs = net.retry(lambda: yf.Ticker(symbol).dividends, "yfinance.dividends", symbol)
+            dates, amounts = pd.to_datetime(divs.index).tz_localize(None).normalize(), divs.to_numpy()
+        elif source == "etf":
+            ak = _akshare()
+            df = net.retry(
+                lambda: ak.fund_open_fund_dividend_em(symbol=symbol), "akshare.fund_open_fund_dividend_em", symbol
+            )
+            dates, amounts = df['权益登记日'], df['每份分红']
+        else:
+            ak = _akshare()
+            df = net.retry(
+                lambda: ak.stock_history_dividend_detail(symbol=symbol, indicator="分红"),
+                "akshare.stock_history_dividend_detail",
+                symbol,
+            )
+            # 派息口径为“每10股”
+            dates, amounts = df['股权登记日'], pd.to_numeric(df['派息'], errors="coerce") / 10
+        out = pd.DataFrame(
+            {
+                "date": pd.to_datetime(dates, errors="coerce"),
+                "amount": pd.to_numeric(amounts, errors="coerce"),
+            }
+        ).dropna()
+        return out[out["amount"] > 0].sort_values("date")
+
+    def _yf_closes(self, codes: list[str], start: str, end: str):
+        import pandas as pd
+        import yfinance as yf
+
+        data = net.retry(
+            lambda: yf.download(
+                codes, start=start, end=end, interval="1d", progress=False, auto_adjust=False, threads=True
+            ),
+            "yfinance.download",
+            ",".join(codes),
+        )
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(codes[0])
+        closes.index = pd.to_datetime(closes.index).tz_localize(None).normalize()
+        return closes.reindex(columns=codes)
+
+
+# 后端对外的方法；FixtureProvider / RecordingProvider 按这份清单回放/录制
+METHODS = (
+    "us_rate",
+    "spot_table",
+    "hk_price",
+    "hk_closes",
+    "dividend_plans",
+    "price_history",
+    "dividend_events",
+)
+
+
+def fixture_path(root: str, method: str, args: tuple) -> str:
+    name = "_".join(",".join(a) if isinstance(a, (list, tuple)) else str(a) for a in args) or "default"
+    return os.path.join(root, method, re.sub(r"[^\w.,^-]", "_", name) + ".pkl")
+
+
+class FixtureProvider:
+    name = "fixture"
+    cacheable = False
+
+    def __init__(self, root: str | None = None):
+        self.root = root or PROVIDER_CONFIG["FIXTURE_DIR"]
+
+    def _replay(self, method: str, *args):
+        path = fixture_path(self.root, method, args)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            raise FixtureMissing(f"没有录制的响应: {path}") from None
+
+    def __getattr__(self, method: str):
+        if method not in METHODS:
+            raise AttributeError(method)
+        return lambda *args: self._replay(method, *args)
+
+
+class RecordingProvider:
+    name = "record"
+    cacheable = False
+
+    def __init__(self, inner=None, root: str | None = None):
+        self.inner = inner or LiveProvider()
+        self.root = root or PROVIDER_CONFIG["FIXTURE_DIR"]
+
+    def _record(self, method: str, *args):
+        value = getattr(self.inner, method)(*args)
+        path = fixture_path(self.root, method, args)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 与 cache.py 一致：临时文件名带线程 id，advisor 并发录制同一 fixture 时各写各的
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return value
+
+    def __getattr__(self, method: str):
+        if method not in METHODS:
+            raise AttributeError(method)
+        return lambda *args: self._record(method, *args)
+
+
+BACKENDS = {
+    "live": LiveProvider,
+    "fixture": FixtureProvider,
+    "record": RecordingProvider,
+}
+
+_current = None
+
+
+def get():
+    global _current
+    if _current is None:
+        _current = BACKENDS[PROVIDER_CONFIG["BACKEND"]]()
+    return _current
+
+
+def use(provider):
+    # 切换后端（传入实例或 BACKENDS 里的名字），返回之前的后端
+    global _current
+    previous = _current
+    _current = BACKENDS[provider]() if isinstance(provider, str) else provider
+    return previous
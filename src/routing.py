@@ -0,0 +1,93 @@
+# 综合方案的资金路由（SOP 逻辑），供 advisor 和参数寻优共用。
+# - route(): 单次方案，纯 Python，不依赖 numpy（保证手动模式秒级启动）
+# - route_arrays(): 同一逻辑的数组版本，用于历史回放/批量计算
+from src.config import ADVISOR_SPLIT
+from src.signals import SELL, STOP, STRONG_BUY
+
+BUCKETS = ("buy_growth", "buy_defense", "buy_a", "buy_hk")
+
+
+def base_allocation(total_amount: float, split: dict | None = None) -> dict:
+    split = ADVISOR_SPLIT if split is None else split
+    return {name: total_amount * float(weight) for name, weight in split.items()}
+
+
+def route(total_amount: float, sig_a: str, sig_hk: str, split: dict | None = None) -> dict:
+    alloc = base_allocation(total_amount, split)
+    final_plan = {
+        "buy_growth": alloc["growth"],
+        "buy_defense": alloc["defense"], # Base defense
+        "buy_a": alloc["a_share"],
+        "buy_hk": alloc["hk_share"]
+    }
+
+    free_cash = 0
+    stopped = []
+
+    # STOP/SELL sectors release their budget as free cash
+    for sector, sig in (("buy_a", sig_a), ("buy_hk", sig_hk)):
+        if sig in ["STOP", "SELL"]:
+            free_cash += final_plan[sector]
+            final_plan[sector] = 0
+            stopped.append(sector)
+
+    # Candidates for extra funding
+    candidates = []
+    if sig_a == "STRONG_BUY": candidates.append("buy_a")
+    if sig_hk == "STRONG_BUY": candidates.append("buy_hk")
+
+    ammo_per_sector = 0.0
+    if candidates:
+        # We have opportunities! Mobilize the Defense layer AND any free cash from stopped sectors.
+        total_ammo = free_cash + final_plan["buy_defense"]
+        final_plan["buy_defense"] = 0
+        # Split ammo equally as per SOP "All in"
+        ammo_per_sector = total_ammo / len(candidates)
+        for sector in candidates:
+            final_plan[sector] += ammo_per_sector
+    elif free_cash > 0:
+        # No strong buy opportunities. Free cash goes to Defense (SGOV)
+        final_plan["buy_defense"] += free_cash
+
+    return {
+        "alloc": alloc,
+        "plan": final_plan,
+        "free_cash": free_cash,
+        "stopped": stopped,
+        "candidates": candidates,
+        "ammo_per_sector": ammo_per_sector,
+    }
+
+
+def route_arrays(amount, sig_a, sig_hk, split):
+    # 数组版 route()：sig_a / sig_hk 为 src.signals 的整数编码，amount 与 split 的各项可广播。
+    # 返回 {bucket: ndarray}，与 route()["plan"] 的 key 一致。
+    import numpy as np
+
+    sig_a = np.asarray(sig_a)
+    sig_hk = np.asarray(sig_hk)
+    amount = np.asarray(amount, dtype="float64")
+
+    growth = amount * split["growth"]
+    defense = amount * split["defense"]
+    buy_a = amount * split["a_share"]
+    buy_hk = amount * split["hk_share"]
+
+    a_stop = (sig_a == STOP) | (sig_a == SELL)
+    hk_stop = (sig_hk == STOP) | (sig_hk == SELL)
+    free_cash = np.where(a_stop, buy_a, 0.0) + np.where(hk_stop, buy_hk, 0.0)
+    buy_a = np.where(a_stop, 0.0, buy_a)
+    buy_hk = np.where(hk_stop, 0.0, buy_hk)
+
+    a_sb = sig_a == STRONG_BUY
+    hk_sb = sig_hk == STRONG_BUY
+    n_candidates = a_sb.astype(np.int8) + hk_sb.astype(np.int8)
+    has = n_candidates > 0
+
+    ammo = np.where(has, (free_cash + defense) / np.maximum(n_candidates, 1), 0.0)
+    defense = np.where(has, 0.0, defense + free_cash)
+    buy_a = buy_a + ammo * a_sb
+    buy_hk = buy_hk + ammo * hk_sb
+
+    growth = np.broadcast_to(growth, buy_a.shape)
+    return {"buy_growth": growth, "buy_defense": defense, "buy_a": buy_a, "buy_hk": buy_hk}
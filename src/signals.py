@@ -0,0 +1,100 @@
+# 利差 -> 信号的统一引擎。
+# 各策略的 if/elif 阈值链本质上都是“把利差落到若干个区间里”，这里统一成区间边界：
+# - lower 边界按 “<= 边界” 划分（TAKE_PROFIT / STOP_BUY）
+# - upper 边界按 “>= 边界” 划分（NORMAL_BUY / BUY_DIP，或 NEUTRAL / OVERWEIGHT）
+# 区间编号 = bisect_left(lower, x) + bisect_right(upper, x)；数组版用 np.searchsorted 一次完成。
+# 阈值需满足 TAKE_PROFIT <= STOP_BUY < NORMAL_BUY <= BUY_DIP（配置里的默认值均满足）。
+#
+# 编码按“买入意愿”从低到高排列，因此多个标的的综合信号就是编码最大的那个
+# （STRONG_BUY > BUY > HOLD > STOP > SELL）。DATA_ERROR 不参与编码。
+from bisect import bisect_left, bisect_right
+
+SIGNALS = ("SELL", "STOP", "HOLD", "BUY", "STRONG_BUY")
+SELL, STOP, HOLD, BUY, STRONG_BUY = range(len(SIGNALS))
+SIGNAL_CODES = {name: code for code, name in enumerate(SIGNALS)}
+
+# 核心定投 / 分红资产池的档位（相对 CNY_HURDLE_RATE 的利差）
+LEVELS = ("DEFENSE", "DCA", "OVERWEIGHT")
+DEFENSE, DCA, OVERWEIGHT = range(len(LEVELS))
+
+
+def spread_edges(thresholds: dict) -> tuple[tuple, tuple]:
+    # A股/港股：THRESHOLDS = {BUY_DIP, NORMAL_BUY, TAKE_PROFIT, STOP_BUY}
+    return (
+        (thresholds["TAKE_PROFIT"], thresholds["STOP_BUY"]),
+        (thresholds["NORMAL_BUY"], thresholds["BUY_DIP"]),
+    )
+
+
+def level_edges(spread_thresholds: dict) -> tuple[tuple, tuple]:
+    # 核心定投：SPREAD_THRESHOLDS = {OVERWEIGHT, NEUTRAL}
+    return (), (spread_thresholds["NEUTRAL"], spread_thresholds["OVERWEIGHT"])
+
+
+def band(value: float, edges: tuple[tuple, tuple]) -> int:
+    lower, upper = edges
+    return bisect_left(lower, value) + bisect_right(upper, value)
+
+
+def trigger_price(div: float, base: float, threshold: float) -> float:
+    # 利差 = div / price * 100 - base 随价格单调递减：利差 >= threshold 等价于 price <= 返回值。
+    # base + threshold <= 0 时任何价格都满足，记为 inf
+    rate = base + threshold
+    return div / (rate / 100) if rate > 0 else float("inf")
+
+
+def price_edges(div: float, base: float, edges: tuple[tuple, tuple]) -> tuple[tuple, tuple]:
+    # 利差边界 -> 价格边界（各自升序），供 price_band 直接对报价二分查找
+    lower, upper = edges
+    return (
+        tuple(sorted(trigger_price(div, base, e) for e in lower)),
+        tuple(sorted(trigger_price(div, base, e) for e in upper)),
+    )
+
+
+def price_band(price: float, edges: tuple[tuple, tuple]) -> int:
+    # 与 band(利差) 等价：利差 > lower 边界 ⇔ 价格 < 对应价格；利差 >= upper 边界 ⇔ 价格 <= 对应价格
+    lower, upper = edges
+    return len(lower) + len(upper) - bisect_right(lower, price) - bisect_left(upper, price)
+
+
+def band_array(values, edges: tuple[tuple, tuple], missing: int):
+    # values 任意形状；边界为标量时走 np.searchsorted，
+    # 边界为数组时（如参数寻优里每行一组阈值）按广播比较逐个累加，结果相同。
+    import numpy as np
+
+    values = np.asarray(values, dtype="float64")
+    lower, upper = edges
+    if all(np.ndim(e) == 0 for e in (*lower, *upper)):
+        out = np.searchsorted(np.asarray(lower, dtype="float64"), values, side="left")
+        out = out + np.searchsorted(np.asarray(upper, dtype="float64"), values, side="right")
+    else:
+        out = sum((values > e).astype(np.int8) for e in lower) + sum(
+            (values >= e).astype(np.int8) for e in upper
+        )
+    return np.where(np.isnan(values), missing, out).astype(np.int8)
+
+
+def classify(spread: float, thresholds: dict) -> str:
+    return SIGNALS[band(spread, spread_edges(thresholds))]
+
+
+def classify_array(spreads, thresholds: dict, missing: int = HOLD):
+    # 返回 SIGNALS 的整数编码数组；利差为 NaN（无数据）时记为 missing
+    return band_array(spreads, spread_edges(thresholds), missing)
+
+
+def classify_level(spread: float, spread_thresholds: dict) -> str:
+    return LEVELS[band(spread, level_edges(spread_thresholds))]
+
+
+def classify_level_array(spreads, spread_thresholds: dict, missing: int = DEFENSE):
+    return band_array(spreads, level_edges(spread_thresholds), missing)
+
+
+def strongest(signals) -> str:
+    # 综合信号：只要有一个 STRONG_BUY 整个板块就是 STRONG_BUY；全部无数据时按 HOLD
+    codes = [SIGNAL_CODES[s] for s in signals if s in SIGNAL_CODES]
+    if not codes:
+        return "HOLD"
+    return SIGNALS[max(codes)]
@@ -0,0 +1,258 @@
+# 利差的流式统计：每个标的维护指数加权的均值/方差（z-score）和固定分箱直方图（近似分位数），
+# 回答“今天的利差在它自己的历史里处于什么位置”。
+# - 每次观测 O(1) 更新，内存固定（分箱数由配置决定），不回看全量历史
+# - 半衰期 HALFLIFE_DAYS：越近的观测权重越大；前 1/alpha 个观测内按等权累计，避免冷启动偏差
+# - 同一标的每天只计一次：同一天重复运行时，先恢复当天更新前的状态，再用最新利差重新更新
+# - 状态存成一个 JSON 文件（SPREAD_STATS_CONFIG["FILE"]），跨次运行累积；读-改-写期间对旁边的 .lock 文件
+#   加排他锁（fcntl.flock），多个进程同时运行时不会互相覆盖对方的观测
+# - 由各入口的 run() 每次运行调用一次 observe()（与运行日志一致），analyze() 本身不读写状态
+# 用法:
+#   uv run -m src.spread_stats            # 查看已记录的全部标的
+#   uv run -m src.spread_stats --reset a_share:510880
+import argparse
+import fcntl
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from src.config import SPREAD_STATS_CONFIG
+
+_lock = threading.Lock()
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+class SpreadStats:
+    __slots__ = ("count", "mean", "var", "bins", "day", "prev")
+
+    def __init__(self):
+        cfg = SPREAD_STATS_CONFIG
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        # 首尾两个分箱兼作下溢/上溢箱
+        self.bins = [0.0] * int(round((cfg["BIN_MAX"] - cfg["BIN_MIN"]) / cfg["BIN_WIDTH"]))
+        self.day = None
+        # 当天更新前的状态 (count, mean, var, bins)，用于同日重复运行时替换当天的观测
+        self.prev = None
+
+    def _bin(self, value: float) -> int:
+        cfg = SPREAD_STATS_CONFIG
+        i = int((value - cfg["BIN_MIN"]) // cfg["BIN_WIDTH"])
+        return min(max(i, 0), len(self.bins) - 1)
+
+    def update(self, value: float, day: str):
+        if day == self.day and self.prev is not None:
+            self.count, self.mean, self.var, bins = self.prev
+            self.bins = list(bins)
+        else:
+            self.prev = (self.count, self.mean, self.var, tuple(self.bins))
+            self.day = day
+
+        # 冷启动时 alpha = 1/n（等权累计），之后固定为半衰期对应的衰减系数
+        alpha = max(1.0 / (self.count + 1), 1 - 0.5 ** (1 / SPREAD_STATS_CONFIG["HALFLIFE_DAYS"]))
+        diff = value - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        self.count += 1
+
+        keep = 1 - alpha
+        bins = self.bins
+        for i in range(len(bins)):
+            bins[i] *= keep
+        bins[self._bin(value)] += alpha
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    def zscore(self, value: float) -> float | None:
+        if self.count < 2 or self.var <= 0:
+            return None
+        return (value - self.mean) / self.std
+
+    def percentile(self, value: float) -> float | None:
+        # 权重低于 value 的比例（0~100），分箱内按线性插值
+        total = sum(self.bins)
+        if self.count == 0 or total <= 0:
+            return None
+        cfg = SPREAD_STATS_CONFIG
+        i = self._bin(value)
+        frac = (value - cfg["BIN_MIN"]) / cfg["BIN_WIDTH"] - i
+        below = sum(self.bins[:i]) + self.bins[i] * min(max(frac, 0.0), 1.0)
+        return below / total * 100
+
+    def quantile(self, p: float) -> float | None:
+        # 直方图上的近似分位数（分箱内线性插值），p 为 0~100
+        total = sum(self.bins)
+        if total <= 0:
+            return None
+        cfg = SPREAD_STATS_CONFIG
+        target = total * p / 100
+        acc = 0.0
+        for i, w in enumerate(self.bins):
+            if w > 0 and acc + w >= target:
+                return cfg["BIN_MIN"] + (i + (target - acc) / w) * cfg["BIN_WIDTH"]
+            acc += w
+        return cfg["BIN_MAX"]
+
+    def summary(self, value: float) -> dict:
+        # 样本太少时 z-score / 分位没有参考意义，只报告均值
+        ready = self.count >= SPREAD_STATS_CONFIG["MIN_OBSERVATIONS"]
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "zscore": self.zscore(value) if ready else None,
+            "percentile": self.percentile(value) if ready else None,
+        }
+
+    def to_dict(self) -> dict:
+        # 直方图稀疏存储 {分箱序号: 权重}，文件大小与实际出现过的利差区间成正比
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "var": self.var,
+            "bins": {i: w for i, w in enumerate(self.bins) if w > 0},
+            "day": self.day,
+            "prev": None if self.prev is None else {
+                "count": self.prev[0],
+                "mean": self.prev[1],
+                "var": self.prev[2],
+                "bins": {i: w for i, w in enumerate(self.prev[3]) if w > 0},
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpreadStats":
+        stats = cls()
+
+        def dense(sparse):
+            bins = [0.0] * len(stats.bins)
+            for i, w in sparse.items():
+                if int(i) < len(bins):
+                    bins[int(i)] = float(w)
+            return bins
+
+        stats.count, stats.mean, stats.var = int(data["count"]), float(data["mean"]), float(data["var"])
+        stats.bins = dense(data["bins"])
+        stats.day = data.get("day")
+        prev = data.get("prev")
+        if prev is not None:
+            stats.prev = (int(prev["count"]), float(prev["mean"]), float(prev["var"]), tuple(dense(prev["bins"])))
+        return stats
+
+
+def _path(path: str | None) -> str:
+    return path or SPREAD_STATS_CONFIG["FILE"]
+
+
+def load(path: str | None = None) -> dict[str, SpreadStats]:
+    try:
+        with open(_path(path), encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log(f"利差统计文件读取失败，重新开始累计: {e}")
+        return {}
+    return {target: SpreadStats.from_dict(d) for target, d in data.items()}
+
+
+def save(stats: dict[str, SpreadStats], path: str | None = None):
+    path = _path(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({target: s.to_dict() for target, s in stats.items()}, f)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _file_lock(path: str | None):
+    # 跨进程的排他锁；锁文件打不开时（如只读目录）退化为只有进程内的锁，读写失败由调用方记日志
+    path = _path(path)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        f = open(f"{path}.lock", "a")
+    except OSError as e:
+        log(f"利差统计锁文件打开失败: {e}")
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def observe(observations: dict[str, float], day: str | None = None, path: str | None = None) -> dict[str, dict]:
+    # observations: {target: 利差}；更新并保存状态，返回 {target: count/mean/std/zscore/percentile}
+    # 未启用时不读写文件，返回空 dict
+    if not SPREAD_STATS_CONFIG["ENABLED"] or not observations:
+        return {}
+    day = day or date.today().isoformat()
+    with _lock, _file_lock(path):
+        stats = load(path)
+        out = {}
+        for target, value in observations.items():
+            s = stats.get(target)
+            if s is None:
+                s = stats[target] = SpreadStats()
+            s.update(float(value), day)
+            out[target] = s.summary(float(value))
+        try:
+            save(stats, path)
+        except OSError as e:
+            log(f"利差统计保存失败: {e}")
+    return out
+
+
+def describe(summary: dict | None) -> str:
+    # 供各策略 run() 打印一行历史位置；样本不足时只给出已有部分
+    if not summary:
+        return ""
+    parts = [f"历史均值 {summary['mean']:+.2f}%"]
+    if summary["zscore"] is not None:
+        parts.append(f"z={summary['zscore']:+.2f}")
+    if summary["percentile"] is not None:
+        parts.append(f"分位 {summary['percentile']:.0f}%")
+    parts.append(f"{summary['count']} 天")
+    return " | ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or reset the persisted streaming spread statistics")
+    parser.add_argument("--file", default=None, help="State file (default: SPREAD_STATS_CONFIG['FILE'])")
+    parser.add_argument("--reset", action="append", default=None, help="Drop a target's statistics (repeatable)")
+    args = parser.parse_args()
+
+    if args.reset:
+        with _file_lock(args.file):
+            stats = load(args.file)
+            for target in args.reset:
+                if stats.pop(target, None) is None:
+                    log(f"没有该标的的统计: {target}")
+            save(stats, args.file)
+    else:
+        stats = load(args.file)
+
+    print(f"\n{'target':<22}{'days':>6}{'mean %':>9}{'std %':>8}{'p10':>8}{'p50':>8}{'p90':>8}  last")
+    print("-" * 80)
+    for target, s in sorted(stats.items()):
+        q = [s.quantile(p) for p in (10, 50, 90)]
+        print(
+            f"{target:<22}{s.count:>6}{s.mean:>+9.2f}{s.std:>8.2f}"
+            + "".join(f"{v:>+8.2f}" if v is not None else f"{'-':>8}" for v in q)
+            + f"  {s.day}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,33 @@
-import akshare as ak
-import yfinance as yf
-import pandas as pd
-from datetime import datetime, timedelta
-from src.config import A_SHARE_CONFIG, BENCHMARK_TICKER, MANUAL_US_RATE
+import argparse
+from datetime import datetime
+from src.config import A_SHARE_CONFIG
+from src import journal, market_data, profiling, spread_stats
+from src.signals import classify, trigger_price
 
 def log(msg):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
-def get_data():
+@profiling.timed("a_share.get_ttm_div")
+def get_ttm_div(code):
+    # 返回 TTM 分红；MANUAL_TTM_DIV 优先，分红数据不可用时返回 None
+    if A_SHARE_CONFIG.get("MANUAL_TTM_DIV") is not None:
+        return float(A_SHARE_CONFIG["MANUAL_TTM_DIV"])
+
+    # 分红事件走本地历史库 + 进程内的 TTM 序列（ttm_dividend.for_symbol），重复调用只做两次二分查找
+    from src.ttm_dividend import for_symbol
+
     try:
-        # 获取美债
-        if MANUAL_US_RATE is not None:
-            us_rate = float(MANUAL_US_RATE)
-        else:
-            us_ticker = yf.Ticker(BENCHMARK_TICKER)
-            # 加上 verify=False 或 proxy 如果在内网环境受限
-            us_rate = us_ticker.history(period="1d")['Close'].iloc[-1]
+        return for_symbol(code).today()
+    except RuntimeError as e:
+        log(f"{code} 分红数据获取失败（{e}）；可在 src/config.py 手动填写 MANUAL_TTM_DIV。")
+        return None
+
+@profiling.timed("a_share.get_data")
+def get_data(ttl=None):
+    # ttl 只作用于行情（美债/ETF 价格）；分红表仍按默认缓存有效期
+    try:
+        # 获取美债（MANUAL_US_RATE 优先，其次读共享缓存）
+        us_rate = market_data.get_us_rate(ttl)
 
         # 获取 A股 ETF
         code = A_SHARE_CONFIG["CODE"]
@@ -23,42 +35,28 @@ def get_data():
         if A_SHARE_CONFIG.get("MANUAL_PRICE") is not None:
             price = float(A_SHARE_CONFIG["MANUAL_PRICE"])
         else:
-            etf_spot = ak.fund_etf_spot_em()
-            target = etf_spot[etf_spot['代码'] == code]
-            if target.empty: return None, None, None
-            price = float(target.iloc[0]['最新价'])
+            price = market_data.get_etf_price(code, ttl)
+            if price is None: return None, None, None
 
         # 获取分红
-        if A_SHARE_CONFIG.get("MANUAL_TTM_DIV") is not None:
-            ttm_div = float(A_SHARE_CONFIG["MANUAL_TTM_DIV"])
-        else:
-            div_fn = getattr(ak, "fund_open_fund_dividend_em", None)
-            if div_fn is None:
-                log("当前 akshare 版本缺少 fund_open_fund_dividend_em；请在 src/config.py 手动填写 MANUAL_TTM_DIV。")
-                return None, None, None
-
-            div_df = div_fn(symbol=code)
-            div_df['权益登记日'] = pd.to_datetime(div_df['权益登记日'])
-            one_year_ago = datetime.now() - timedelta(days=365)
-            ttm_div = div_df[div_df['权益登记日'] >= one_year_ago]['每份分红'].astype(float).sum()
+        ttm_div = get_ttm_div(code)
+        if ttm_div is None:
+            return None, None, None
 
         return price, ttm_div, us_rate
     except Exception as e:
         log(f"数据抓取失败: {e}")
         return None, None, None
 
-def analyze():
-    price, ttm_div, us_rate = get_data()
-    if price is None:
-        return {"signal": "DATA_ERROR", "metrics": None}
-
+def evaluate(price, ttm_div, us_rate):
+    # 纯计算：相同输入必然得到相同结果，watch 模式据此跳过输入未变的重算
     etf_yield = (ttm_div / price) * 100
     spread = etf_yield - us_rate
     cfg = A_SHARE_CONFIG["THRESHOLDS"]
 
     # 反推价格
-    price_buy_dip = ttm_div / ((us_rate + cfg["BUY_DIP"]) / 100)
-    price_stop = ttm_div / ((us_rate + cfg["STOP_BUY"]) / 100)
+    price_buy_dip = trigger_price(ttm_div, us_rate, cfg["BUY_DIP"])
+    price_stop = trigger_price(ttm_div, us_rate, cfg["STOP_BUY"])
     
     metrics = {
         "price": price,
@@ -70,22 +68,28 @@ def analyze():
         "price_stop": price_stop
     }
 
-    if spread >= cfg["BUY_DIP"]:
-        signal = "STRONG_BUY"
-    elif spread >= cfg["NORMAL_BUY"]:
-        signal = "BUY"
-    elif spread <= cfg["TAKE_PROFIT"]:
-        signal = "SELL"
-    elif spread <= cfg["STOP_BUY"]:
-        signal = "STOP"
-    else:
-        signal = "HOLD"
-    
-    return {"signal": signal, "metrics": metrics}
+    return {"signal": classify(spread, cfg), "metrics": metrics}
+
+@profiling.timed("a_share.analyze")
+def analyze(ttl=None):
+    price, ttm_div, us_rate = get_data(ttl)
+    if price is None:
+        return {"signal": "DATA_ERROR", "metrics": None}
+    return evaluate(price, ttm_div, us_rate)
+
+def observe_history(result):
+    # 利差在自身历史里的位置（z-score / 分位），跨次运行累积，写入 metrics["history"]；未启用时为 None。
+    # 由入口的 run() 每次运行调用一次，analyze() 被反复调用（watch / benchmark）时不会重复计入
+    if result["metrics"] is None:
+        return
+    target = f"a_share:{A_SHARE_CONFIG['CODE']}"
+    result["metrics"]["history"] = spread_stats.observe({target: result["metrics"]["spread"]}).get(target)
 
 def run():
     print(f"\n=== A股策略: {A_SHARE_CONFIG['CODE']} vs 美债 ===")
     result = analyze()
+    observe_history(result)
+    journal.record("strategy_a_share", [journal.row("a_share", A_SHARE_CONFIG["CODE"], result)])
     
     if result["signal"] == "DATA_ERROR":
         print("数据获取失败，跳过。")
@@ -95,6 +99,8 @@ def run():
     print(f"当前价格: {m['price']:.3f} | TTM分红: {m['ttm_div']:.3f}")
     print(f"ETF股息率: {m['etf_yield']:.2f}% | 美债利率: {m['us_rate']:.2f}%")
     print(f"真实利差: {m['spread']:+.2f}%")
+    if m["history"]:
+        print(f"利差位置: {spread_stats.describe(m['history'])}")
     print(f"📉 补仓价 (<): {m['price_buy_dip']:.3f} | ⛔ 停买价 (>): {m['price_stop']:.3f}")
     print("-" * 30)
 
@@ -112,5 +118,12 @@ def run():
     else:
         print("🟡 [HOLD] 观望。")
 
+def main():
+    parser = argparse.ArgumentParser(description="A-share dividend ETF vs US Treasury spread")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "strategy_a_share"):
+        run()
+
 if __name__ == "__main__":
-    run()
+    main()
@@ -2,39 +2,40 @@ import argparse
 from datetime import datetime
 
 from src.config import A_SHARE_CONFIG, A_SHARE_DIVIDEND_TARGETS, CNY_HURDLE_RATE, CORE_DCA_CONFIG
+from src import journal, market_data, profiling
+from src.signals import classify_level, trigger_price
 
 
 def log(msg: str):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
 
+def get_manual_fields(code: str, target: dict) -> tuple[float | None, float | None, float | None]:
+    # 与 A_SHARE_CONFIG 同代码的标的以 A_SHARE_CONFIG 的手动字段为准
+    source = A_SHARE_CONFIG if code == A_SHARE_CONFIG.get("CODE") else target
+    values = (source.get("MANUAL_PRICE"), source.get("MANUAL_TTM_DIV"), source.get("MANUAL_INDEX_YIELD"))
+    return tuple(float(v) if v is not None else None for v in values)
+
+
 def _get_target_manual_inputs(
     code: str, target: dict
 ) -> tuple[float | None, float | None, float | None]:
-    if code == A_SHARE_CONFIG.get("CODE"):
-        price = A_SHARE_CONFIG.get("MANUAL_PRICE")
-        ttm_div = A_SHARE_CONFIG.get("MANUAL_TTM_DIV")
-        index_yield = A_SHARE_CONFIG.get("MANUAL_INDEX_YIELD")
-    else:
-        price = target.get("MANUAL_PRICE")
-        ttm_div = target.get("MANUAL_TTM_DIV")
-        index_yield = target.get("MANUAL_INDEX_YIELD")
-
-    price = float(price) if price is not None else None
-    ttm_div = float(ttm_div) if ttm_div is not None else None
-    index_yield = float(index_yield) if index_yield is not None else None
+    price, ttm_div, index_yield = get_manual_fields(code, target)
+
+    # ETF 已有分红但未手动填价时，从共享的全市场 ETF 快照里按代码取价（整池只下载一次）
+    if price is None and ttm_div is not None and target.get("kind") == "etf":
+        try:
+            price = market_data.get_etf_price(code)
+        except Exception as e:
+            log(f"{code} 行情获取失败: {e}")
     return price, ttm_div, index_yield
 
 
 def decide_action(spread_vs_hurdle: float) -> str:
-    th = CORE_DCA_CONFIG["SPREAD_THRESHOLDS"]
-    if spread_vs_hurdle >= th["OVERWEIGHT"]:
-        return "OVERWEIGHT"
-    if spread_vs_hurdle >= th["NEUTRAL"]:
-        return "DCA"
-    return "DEFENSE"
+    return classify_level(spread_vs_hurdle, CORE_DCA_CONFIG["SPREAD_THRESHOLDS"])
 
 
+@profiling.timed("dividend_targets.analyze")
 def analyze():
     hurdle = float(CNY_HURDLE_RATE)
     results: dict[str, dict] = {}
@@ -55,6 +56,7 @@ def analyze():
 
         spread = float(decision_yield) - hurdle
         signal = decide_action(spread)
+        th = CORE_DCA_CONFIG["SPREAD_THRESHOLDS"]
 
         results[code] = {
             "name": target.get("name", code),
@@ -67,6 +69,8 @@ def analyze():
                 "decision_yield": decision_yield,
                 "hurdle_rate": hurdle,
                 "spread_vs_hurdle": spread,
+                "price_overweight": trigger_price(ttm_div, hurdle, th["OVERWEIGHT"]) if ttm_div is not None else None,
+                "price_neutral": trigger_price(ttm_div, hurdle, th["NEUTRAL"]) if ttm_div is not None else None,
             },
             "note": None,
         }
@@ -80,6 +84,10 @@ def run():
     print("-" * 70)
 
     results = analyze()
+    journal.record(
+        "strategy_a_share_dividend_targets",
+        [journal.row("dividend", f"dividend:{code}", r, spread_key="spread_vs_hurdle") for code, r in results.items()],
+    )
 
     for code, res in results.items():
         name = res["name"]
@@ -99,6 +107,10 @@ def run():
             f"  - 现价: {price_disp} | TTM分红: {ttm_div_disp} | 到手现金流口径: {cash_yield_disp} | 指数口径: {index_yield_disp}"
         )
         print(f"  - 用于决策的收益率口径: {m['decision_yield']:.2f}% | 利差: {m['spread_vs_hurdle']:+.2f}%")
+        if m["price_overweight"] is not None:
+            print(
+                f"  - 现金流口径参考价位：OVERWEIGHT 价(<): {m['price_overweight']:.3f} | NEUTRAL 价(<): {m['price_neutral']:.3f}"
+            )
         if sig == "OVERWEIGHT":
             print("  - 结论: 值得加大买入（本月新增资金可倾斜到该标的）")
         elif sig == "DCA":
@@ -109,8 +121,20 @@ def run():
 
 def main():
     parser = argparse.ArgumentParser(description="A-share dividend targets (manual inputs; no selling)")
-    _ = parser.parse_args()
-    run()
+    parser.add_argument("--screen", action="store_true", help="Screen the full A-share market (stocks + ETFs)")
+    parser.add_argument("--top", type=int, default=None, help="Number of OVERWEIGHT candidates to show")
+    parser.add_argument("--min-turnover", type=float, default=None, help="Minimum daily turnover (CNY)")
+    parser.add_argument("--min-years", type=int, default=None, help="Minimum years with dividends in the lookback")
+    parser.add_argument("--fetch-dividends", action="store_true", help="Screen: fetch dividends for ETFs missing from the local history store")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "dividend_targets"):
+        if args.screen:
+            from src.dividend_screener import run as run_screen
+
+            run_screen(args.top, args.min_turnover, args.min_years, args.fetch_dividends)
+            return
+        run()
 
 
 if __name__ == "__main__":
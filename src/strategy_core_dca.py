@@ -1,7 +1,11 @@
 import argparse
 from datetime import datetime
 
+from src import journal, profiling
 from src.config import A_SHARE_CONFIG, CNY_HURDLE_RATE, CORE_DCA_CONFIG
+from src.signals import classify_level
+
+EQUITY_BY_LEVEL = {"OVERWEIGHT": "EQUITY_MAX", "DCA": "EQUITY_BASE", "DEFENSE": "EQUITY_MIN"}
 
 
 def log(msg):
@@ -22,15 +26,11 @@ def get_a_share_inputs():
 
 def decide_equity_ratio(spread_vs_hurdle: float) -> float:
     cfg = CORE_DCA_CONFIG
-    th = cfg["SPREAD_THRESHOLDS"]
-
-    if spread_vs_hurdle >= th["OVERWEIGHT"]:
-        return float(cfg["EQUITY_MAX"])
-    if spread_vs_hurdle >= th["NEUTRAL"]:
-        return float(cfg["EQUITY_BASE"])
-    return float(cfg["EQUITY_MIN"])
+    level = classify_level(spread_vs_hurdle, cfg["SPREAD_THRESHOLDS"])
+    return float(cfg[EQUITY_BY_LEVEL[level]])
 
 
+@profiling.timed("core_dca.analyze")
 def analyze(monthly_amount: float):
     price, ttm_div, index_yield = get_a_share_inputs()
     cash_yield = (ttm_div / price) * 100 if (price and ttm_div and price > 0) else None
@@ -81,6 +81,8 @@ def analyze(monthly_amount: float):
 def run(monthly_amount: float):
     print("\n=== 核心定投策略（不卖出，仅调整新增资金比例）===")
     res = analyze(monthly_amount)
+    target = f"core_dca:{A_SHARE_CONFIG['CODE']}"
+    journal.record("strategy_core_dca", [journal.row("core_dca", target, res, spread_key="spread_vs_hurdle")])
 
     if res["signal"] == "DATA_ERROR":
         print(
@@ -121,8 +123,23 @@ def run(monthly_amount: float):
 def main():
     parser = argparse.ArgumentParser(description="Core DCA strategy (no selling; tilt new contributions)")
     parser.add_argument("amount", type=float, help="Monthly available funds (e.g. 20000)")
+    parser.add_argument("--project", type=int, default=None, metavar="YEARS", help="Project dividend cash flow over YEARS of contributions")
+    parser.add_argument("--paths", type=int, default=None, help="Projection: number of simulated yield/dividend paths")
+    parser.add_argument("--seed", type=int, default=None, help="Projection: random seed for reproducible paths")
+    parser.add_argument("--liability", type=float, default=None, help="Projection: liability principal whose interest the dividends should cover")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
-    run(args.amount)
+    if args.project is not None and args.project < 1:
+        parser.error("--project must be at least 1 year")
+    if args.paths is not None and args.paths < 1:
+        parser.error("--paths must be at least 1")
+    with profiling.session(args, "strategy_core_dca"):
+        if args.project is not None:
+            from src.projection import run as run_projection
+
+            run_projection(args.amount, args.project, args.paths, args.seed, args.liability)
+        else:
+            run(args.amount)
 
 
 if __name__ == "__main__":
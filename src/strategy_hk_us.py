@@ -1,89 +1,178 @@
-import yfinance as yf
-from src.config import HK_SHARE_TARGETS, HK_THRESHOLDS, BENCHMARK_TICKER, MANUAL_US_RATE
+import argparse
+import math
+from src.config import BENCHMARK_TICKER, HK_SHARE_TARGETS, HK_THRESHOLDS
+from src import journal, market_data, net, profiling, spread_stats
+from src.signals import SIGNALS, classify, classify_array, trigger_price
 
-def get_metrics(code, info):
-    try:
-        if info.get("MANUAL_PRICE") is not None:
-            price = float(info["MANUAL_PRICE"])
+# 港股通红利税 10%
+DIVIDEND_TAX = 0.10
+
+def net_dividend(info):
+    # 优先使用 config.py 里的 manual_div，按税后口径
+    return (info.get('manual_div') or 0.0) * (1 - DIVIDEND_TAX)
+
+def all_manual(targets) -> bool:
+    # 全部标的都填了 MANUAL_PRICE（PROMPT_AGENT.md 的流程）：不联网，也不必加载 numpy
+    return all(info.get("MANUAL_PRICE") is not None for info in targets.values())
+
+@profiling.timed("hk_share.get_metrics")
+def get_metrics(targets=None, ttl=None):
+    # 返回按列组织的表：code/name/error 为列表，price/net_div/net_yield 为 float64 数组
+    # （全部手动价格时为纯 Python 列表）；价格缺失或无效时 price/net_yield 为 NaN，error 为失败原因（有效行为 None）
+    targets = HK_SHARE_TARGETS if targets is None else targets
+    codes = list(targets)
+    infos = list(targets.values())
+    if all_manual(targets):
+        price = [float(info["MANUAL_PRICE"]) for info in infos]
+        error = [None if p > 0 else f"yfinance.quote:{code} invalid_price: {p}" for code, p in zip(codes, price)]
+        price = [p if e is None else math.nan for p, e in zip(price, error)]
+        net_div = [net_dividend(info) for info in infos]
+        return {
+            "code": codes,
+            "name": [info["name"] for info in infos],
+            "price": price,
+            "net_div": net_div,
+            "net_yield": [d / p * 100 for d, p in zip(net_div, price)],
+            "error": error,
+        }
+
+    import numpy as np
+
+    price = np.array(
+        [np.nan if info.get("MANUAL_PRICE") is None else float(info["MANUAL_PRICE"]) for info in infos],
+        dtype="float64",
+    )
+
+    # 非手动的标的一次性批量取价
+    live = np.isnan(price)
+    errors = {}
+    if live.any():
+        live_codes = [code for code, is_live in zip(codes, live) if is_live]
+        fetched = market_data.get_hk_prices(live_codes, ttl, errors)
+        price[live] = [fetched.get(code, np.nan) for code in live_codes]
+
+    with np.errstate(invalid="ignore"):
+        bad = ~(price > 0)
+    # 失败原因只需为缺价的少数标的逐个生成
+    error = [None] * len(codes)
+    for i in np.flatnonzero(bad).tolist():
+        code, p = codes[i], float(price[i])
+        if code in errors:
+            error[i] = str(errors[code])
+        elif math.isnan(p):
+            error[i] = f"yfinance.quote:{code} empty"
         else:
-            ticker = yf.Ticker(code)
-            price = ticker.fast_info.last_price
-            if not price: 
-                price = ticker.history(period="1d")['Close'].iloc[-1]
-        
-        # 优先使用 config.py 里的 manual_div
-        manual_div = info.get('manual_div')
-        gross_div = manual_div if manual_div else 0.0
-        
-        # 扣税 10%
-        net_div = gross_div * 0.9
-        net_yield = (net_div / price) * 100
-        return price, net_yield
-    except:
-        return None, None
-
-def analyze():
+            error[i] = f"yfinance.quote:{code} invalid_price: {p}"
+    price[bad] = np.nan
+    net_div = np.array([net_dividend(info) for info in infos], dtype="float64")
+    return {
+        "code": codes,
+        "name": [info["name"] for info in infos],
+        "price": price,
+        "net_div": net_div,
+        "net_yield": net_div / price * 100,
+        "error": error,
+    }
+
+def evaluate(price, net_div, us_rate, name):
+    # 单个标的的纯计算；price 为 None 表示无数据
+    if price is None:
+        return {"signal": "DATA_ERROR", "metrics": None}
+
+    net_yield = (net_div / price) * 100
+    spread = net_yield - us_rate
+    cfg = HK_THRESHOLDS
+    return {
+        "signal": classify(spread, cfg),
+        "metrics": {
+            "price": price,
+            "net_yield": net_yield,
+            "us_rate": us_rate,
+            "spread": spread,
+            "name": name,
+            # 反推价格
+            "price_buy_dip": trigger_price(net_div, us_rate, cfg["BUY_DIP"]),
+            "price_stop": trigger_price(net_div, us_rate, cfg["STOP_BUY"]),
+        }
+    }
+
+@profiling.timed("hk_share.analyze")
+def analyze(targets=None, ttl=None):
+    # 数据缺失的标的为 DATA_ERROR，"error" 里给出原因；美债基准失败时全部标的都是 DATA_ERROR
     results = {}
-    
-    if MANUAL_US_RATE is not None:
-        us_rate = float(MANUAL_US_RATE)
-    else:
-        try:
-            us_rate = yf.Ticker(BENCHMARK_TICKER).history(period="1d")['Close'].iloc[-1]
-        except:
-            us_rate = 4.0
-            
+    targets = HK_SHARE_TARGETS if targets is None else targets
+
+    try:
+        us_rate = market_data.get_us_rate(ttl)
+    except Exception as e:
+        error = f"美债基准 {net.as_fetch_error(e, 'yfinance.history', BENCHMARK_TICKER)}"
+        return {code: {"signal": "DATA_ERROR", "metrics": None, "error": error} for code in targets}
+
+    table = get_metrics(targets, ttl)
+    if all_manual(targets):
+        # 纯 Python 逐个计算，与下面的整列计算结果一致
+        for code, name, price, net_div, error in zip(
+            table["code"], table["name"], table["price"], table["net_div"], table["error"]
+        ):
+            if error is not None:
+                results[code] = {"signal": "DATA_ERROR", "metrics": None, "error": error}
+            else:
+                results[code] = evaluate(price, net_div, us_rate, name)
+        return results
+
+    import numpy as np
+
+    n = len(table["code"])
     cfg = HK_THRESHOLDS
-    
-    for code, info in HK_SHARE_TARGETS.items():
-        price, net_yield = get_metrics(code, info)
-        if price is None: 
-            results[code] = {"signal": "DATA_ERROR", "metrics": None}
+
+    # 整列计算利差、信号与反推价格；价格缺失的行利差为 NaN
+    spread = table["net_yield"] - us_rate
+    signals = classify_array(spread, cfg).tolist()
+    buy_dip = np.broadcast_to(trigger_price(table["net_div"], us_rate, cfg["BUY_DIP"]), n).tolist()
+    stop = np.broadcast_to(trigger_price(table["net_div"], us_rate, cfg["STOP_BUY"]), n).tolist()
+
+    for i, (code, name, price, net_yield, sp, error) in enumerate(zip(
+        table["code"], table["name"], table["price"].tolist(), table["net_yield"].tolist(), spread.tolist(), table["error"]
+    )):
+        if error is not None:
+            results[code] = {"signal": "DATA_ERROR", "metrics": None, "error": error}
             continue
-        
-        spread = net_yield - us_rate
-        
-        if spread >= cfg["BUY_DIP"]:
-            signal = "STRONG_BUY"
-        elif spread >= cfg["NORMAL_BUY"]:
-            signal = "BUY"
-        elif spread <= cfg["TAKE_PROFIT"]:
-            signal = "SELL"
-        elif spread <= cfg["STOP_BUY"]:
-            signal = "STOP"
-        else:
-            signal = "HOLD"
-            
         results[code] = {
-            "signal": signal,
+            "signal": SIGNALS[signals[i]],
             "metrics": {
                 "price": price,
                 "net_yield": net_yield,
                 "us_rate": us_rate,
-                "spread": spread,
-                "name": info['name']
-            }
+                "spread": sp,
+                "name": name,
+                "price_buy_dip": buy_dip[i],
+                "price_stop": stop[i],
+            },
         }
     return results
 
+def observe_history(results):
+    # 利差在各自历史里的位置，一次读写统计文件；由入口的 run() 每次运行调用一次
+    valid = {code: r["metrics"]["spread"] for code, r in results.items() if r["metrics"]}
+    history = spread_stats.observe({f"hk_share:{code}": spread for code, spread in valid.items()})
+    for code in valid:
+        results[code]["metrics"]["history"] = history.get(f"hk_share:{code}")
+
 def run():
     print(f"\n=== 港股策略 (税后) vs 美债 ===")
     results = analyze()
+    observe_history(results)
+    journal.record("strategy_hk_us", [journal.row("hk_share", code, r) for code, r in results.items()])
     
-    # Get US rate from first result or default (bit hacky for display but analyze has logic)
-    # Actually better to just grab it from one of the results if valid
-    us_rate_disp = 4.0
-    for r in results.values():
-        if r["metrics"]:
-            us_rate_disp = r["metrics"]["us_rate"]
-            break
-            
-    print(f"🇺🇸 美债基准: {us_rate_disp:.2f}%")
+    # 美债基准从任一有效结果里取；全部缺失时显示 N/A
+    us_rate_disp = next((r["metrics"]["us_rate"] for r in results.values() if r["metrics"]), None)
+
+    print(f"🇺🇸 美债基准: {'N/A' if us_rate_disp is None else f'{us_rate_disp:.2f}%'}")
     cfg = HK_THRESHOLDS
 
     for code, res in results.items():
         if res["signal"] == "DATA_ERROR":
-            print(f"Skipping {code}: Data Error")
+            print(f"Skipping {code}: Data Error ({res.get('error') or 'unknown'})")
             continue
             
         m = res["metrics"]
@@ -91,6 +180,9 @@ def run():
         
         print(f"\n🇭🇰 {m['name']} ({code})")
         print(f"   现价: {m['price']:.2f} | 净回报: {m['net_yield']:.2f}% | 利差: {m['spread']:+.2f}%")
+        print(f"   📉 补仓价 (<): {m['price_buy_dip']:.2f} | ⛔ 停买价 (>): {m['price_stop']:.2f}")
+        if m["history"]:
+            print(f"   📊 利差位置: {spread_stats.describe(m['history'])}")
 
         if sig == "STRONG_BUY":
             print(f"   🟢 [STRONG BUY] 补仓！(目标 > 美债+{cfg['BUY_DIP']}%)")
@@ -103,5 +195,12 @@ def run():
         else:
             print(f"   🟡 [HOLD] 观望。")
 
+def main():
+    parser = argparse.ArgumentParser(description="HK dividend stocks (after tax) vs US Treasury spread")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "strategy_hk_us"):
+        run()
+
 if __name__ == "__main__":
-    run()
+    main()
@@ -0,0 +1,150 @@
+# 触发价索引：把每个标的的利差阈值按 (分红, 基准利率) 反推成价格边界，
+# 之后任意一笔报价只需在 2~4 个升序价格上二分查找即可得到信号，无需重算股息率/利差。
+# 价格边界只依赖分红与基准：两者不变时 update() 直接跳过，只有 TTM 分红或基准变化才重建该标的。
+#
+# 覆盖范围（target 命名与 src.watch 一致）：
+# - a_share:<code>   A股 ETF，TTM 分红 vs 美债，A_SHARE_CONFIG["THRESHOLDS"]
+# - hk_share:<code>  港股，税后分红 vs 美债，HK_THRESHOLDS
+# - dividend:<code>  A股分红资产池，TTM 分红 vs CNY_HURDLE_RATE，CORE_DCA_CONFIG 档位
+# - core_dca:<code>  核心定投，同上
+# 以指数股息率（MANUAL_INDEX_YIELD）决策的标的与价格无关，不进入索引。
+import argparse
+from datetime import datetime
+
+from src.config import (
+    A_SHARE_CONFIG,
+    A_SHARE_DIVIDEND_TARGETS,
+    CNY_HURDLE_RATE,
+    CORE_DCA_CONFIG,
+    HK_SHARE_TARGETS,
+    HK_THRESHOLDS,
+)
+from src import profiling
+from src.signals import LEVELS, SIGNALS, level_edges, price_band, price_edges, spread_edges, trigger_price
+
+# kind -> (阈值 -> 利差边界, 区间标签)
+KINDS = {
+    "signal": (spread_edges, SIGNALS),
+    "level": (level_edges, LEVELS),
+}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+class TriggerIndex:
+    def __init__(self):
+        # target -> (输入 key, 价格边界, 标签)
+        self.entries: dict[str, tuple] = {}
+        self.inputs: dict[str, tuple] = {}
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, target: str) -> bool:
+        return target in self.entries
+
+    def update(self, target: str, div: float, base: float, thresholds: dict, kind: str = "signal") -> bool:
+        # 返回是否重建；分红、基准与阈值都没变时什么也不做
+        key = (div, base, tuple(thresholds.items()), kind)
+        entry = self.entries.get(target)
+        if entry is not None and entry[0] == key:
+            return False
+
+        to_edges, labels = KINDS[kind]
+        self.entries[target] = (key, price_edges(div, base, to_edges(thresholds)), labels)
+        self.inputs[target] = (div, base, thresholds)
+        self.rebuilds += 1
+        return True
+
+    def remove(self, target: str):
+        self.entries.pop(target, None)
+        self.inputs.pop(target, None)
+
+    def classify(self, target: str, price: float) -> str:
+        _, edges, labels = self.entries[target]
+        return labels[price_band(price, edges)]
+
+    def triggers(self, target: str) -> dict[str, float]:
+        # 阈值名 -> 触发价
+        div, base, thresholds = self.inputs[target]
+        return {name: trigger_price(div, base, th) for name, th in thresholds.items()}
+
+
+@profiling.timed("trigger_prices.build")
+def build(us_rate: float | None, hurdle: float | None = None, index: TriggerIndex | None = None):
+    # 按 config 里的全部标的填充索引；返回 (index, skipped)，skipped 为 {target: 原因}
+    from src.strategy_a_share import get_ttm_div
+    from src.strategy_a_share_dividend_targets import get_manual_fields
+    from src.strategy_core_dca import get_a_share_inputs
+    from src.strategy_hk_us import net_dividend
+
+    index = TriggerIndex() if index is None else index
+    hurdle = float(CNY_HURDLE_RATE if hurdle is None else hurdle)
+    level_th = CORE_DCA_CONFIG["SPREAD_THRESHOLDS"]
+    skipped = {}
+
+    code = A_SHARE_CONFIG["CODE"]
+    ttm_div = get_ttm_div(code) if us_rate is not None else None
+    if ttm_div is None:
+        skipped[f"a_share:{code}"] = "缺少 TTM 分红或美债基准"
+    else:
+        index.update(f"a_share:{code}", ttm_div, us_rate, A_SHARE_CONFIG["THRESHOLDS"])
+
+    for code, info in HK_SHARE_TARGETS.items():
+        if us_rate is None:
+            skipped[f"hk_share:{code}"] = "缺少美债基准"
+            continue
+        index.update(f"hk_share:{code}", net_dividend(info), us_rate, HK_THRESHOLDS)
+
+    for code, target in A_SHARE_DIVIDEND_TARGETS.items():
+        _, ttm_div, index_yield = get_manual_fields(code, target)
+        if index_yield is not None:
+            skipped[f"dividend:{code}"] = "按指数股息率决策，与价格无关"
+        elif ttm_div is None:
+            skipped[f"dividend:{code}"] = "缺少 MANUAL_TTM_DIV"
+        else:
+            index.update(f"dividend:{code}", ttm_div, hurdle, level_th, "level")
+
+    _, ttm_div, index_yield = get_a_share_inputs()
+    code = A_SHARE_CONFIG["CODE"]
+    if index_yield is not None:
+        skipped[f"core_dca:{code}"] = "按指数股息率决策，与价格无关"
+    elif ttm_div is None:
+        skipped[f"core_dca:{code}"] = "缺少 MANUAL_TTM_DIV"
+    else:
+        index.update(f"core_dca:{code}", ttm_div, hurdle, level_th, "level")
+
+    return index, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigger-price table for every target and threshold")
+    parser.add_argument("--us-rate", type=float, default=None, help="Override the US benchmark rate (%%)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "trigger_prices"):
+        us_rate = args.us_rate
+        if us_rate is None:
+            from src import market_data
+
+            try:
+                us_rate = market_data.get_us_rate()
+            except Exception as e:
+                log(f"美债基准抓取失败: {e}")
+
+        index, skipped = build(us_rate)
+        rate_disp = f"{us_rate:.2f}%" if us_rate is not None else "N/A"
+        print(f"\n=== 触发价表 | 美债基准: {rate_disp} | 门槛利率(CNY): {CNY_HURDLE_RATE:.2f}% ===")
+        for target in index.entries:
+            div, base, _ = index.inputs[target]
+            prices = " | ".join(f"{name}: {p:.3f}" for name, p in index.triggers(target).items())
+            print(f"{target} (分红 {div:.3f}, 基准 {base:.2f}%) -> {prices}")
+        for target, reason in skipped.items():
+            print(f"{target}: 跳过（{reason}）")
+
+
+if __name__ == "__main__":
+    main()
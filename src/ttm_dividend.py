@@ -0,0 +1,85 @@
+# TTM 分红引擎：每个标的只构建一次“分红事件 + 累计和”序列，
+# 任意日期 d 的 TTM = cum(登记日 <= d) - cum(登记日 <= d - 365)，两次二分查找即可得到，
+# 回测、股息率历史、筛选等需要上千个日期的 TTM 时不再逐日过滤分红表。
+# 新的分红事件到来时增量追加（晚于最后一条时只延长累计和，O(k)）。
+import time
+from datetime import date
+
+import numpy as np
+
+from src.config import CACHE_CONFIG
+
+WINDOW_DAYS = 365
+
+
+class TTMDividendSeries:
+    def __init__(self, dates=(), amounts=(), window_days: int = WINDOW_DAYS):
+        self.window = np.timedelta64(window_days, "D")
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.cum = np.zeros(1)
+        self.add_events(dates, amounts)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def add_events(self, dates, amounts) -> int:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        amounts = np.asarray(amounts, dtype="float64")
+        if len(dates) == 0:
+            return 0
+        order = np.argsort(dates, kind="stable")
+        dates, amounts = dates[order], amounts[order]
+
+        if len(self.dates) == 0 or dates[0] >= self.dates[-1]:
+            # 常见情况：新事件都晚于已有事件，直接延长累计和
+            self.cum = np.concatenate([self.cum, self.cum[-1] + np.cumsum(amounts)])
+            self.dates = np.concatenate([self.dates, dates])
+        else:
+            all_amounts = np.concatenate([np.diff(self.cum), amounts])
+            all_dates = np.concatenate([self.dates, dates])
+            order = np.argsort(all_dates, kind="stable")
+            self.dates = all_dates[order]
+            self.cum = np.concatenate([[0.0], np.cumsum(all_amounts[order])])
+        return len(dates)
+
+    def ttm_at(self, when):
+        # when 可以是单个日期或日期数组；窗口为 (d - 365, d]，与 strategy_a_share 的口径一致
+        scalar = np.ndim(when) == 0
+        when = np.asarray(when, dtype="datetime64[D]")
+        hi = np.searchsorted(self.dates, when, side="right")
+        lo = np.searchsorted(self.dates, when - self.window, side="right")
+        ttm = self.cum[hi] - self.cum[lo]
+        return float(ttm) if scalar else ttm
+
+    def today(self) -> float:
+        return self.ttm_at(np.datetime64(date.today(), "D"))
+
+
+_SERIES: dict[str, TTMDividendSeries] = {}
+# 各标的上次联网增量更新历史库的时间（time.monotonic()），同一进程内按行情缓存的有效期节流
+_REFRESHED: dict[str, float] = {}
+
+
+def for_symbol(symbol: str, offline: bool = False) -> TTMDividendSeries:
+    # 进程内按标的复用；历史库里出现新的分红事件时只追加新增部分。
+    # 历史库缺少该标的时抛出 RuntimeError（与 history_store.get_series 一致）
+    from src import history_store
+
+    now = time.monotonic()
+    if not offline and now - _REFRESHED.get(symbol, -np.inf) < CACHE_CONFIG["TTL_SECONDS"]:
+        offline = True
+    dates, amounts = history_store.get_series("dividend", symbol, offline=offline)
+    if not offline:
+        _REFRESHED[symbol] = now
+
+    series = _SERIES.get(symbol)
+    if series is None:
+        series = _SERIES[symbol] = TTMDividendSeries(dates, amounts)
+    elif len(dates) != len(series):
+        known = len(series)
+        if len(dates) > known and np.array_equal(dates[:known], series.dates):
+            series.add_events(dates[known:], amounts[known:])
+        else:
+            # 补进了登记日更早的事件（history_store 按 (日期, 金额) 合并），整体重建
+            series = _SERIES[symbol] = TTMDividendSeries(dates, amounts)
+    return series
@@ -0,0 +1,187 @@
+# 常驻监控：按固定间隔轮询行情，只重算输入发生变化的标的，信号跨档时才输出事件。
+# - 每个标的在内存里只保留“上次输入 + 上次信号”两项，数百个标的运行数周内存也不会增长
+# - 信号由触发价索引（src.trigger_prices）直接对报价二分得到；只有分红或基准变化时才重建该标的的价格边界，
+#   完整的股息率/利差只在信号变化、需要输出事件时计算一次
+# - 行情走共享缓存，有效期取轮询间隔的一半：每轮最多抓取一次，同一轮内 A股/港股共用美债基准
+# - 抓取失败（无数据）不覆盖上次的有效信号，也不产生事件，避免数据抖动导致误报
+# - 运行日志（src.journal）只记录首轮的初始信号和之后的跨档事件，不按轮询次数逐轮写入
+import argparse
+import json
+import time
+from datetime import datetime
+
+from src.config import A_SHARE_CONFIG, HK_SHARE_TARGETS, HK_THRESHOLDS, WATCH_CONFIG
+from src import journal, market_data, profiling, strategy_a_share, strategy_hk_us
+from src.signals import SIGNAL_CODES
+from src.trigger_prices import TriggerIndex
+
+# 各类标的的阈值与完整计算（只在输出事件时调用）
+THRESHOLDS = {
+    "a_share": A_SHARE_CONFIG["THRESHOLDS"],
+    "hk_share": HK_THRESHOLDS,
+}
+EVALUATORS = {
+    "a_share": lambda price, div, base, name: strategy_a_share.evaluate(price, div, base),
+    "hk_share": strategy_hk_us.evaluate,
+}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
+
+
+def collect_inputs(ttl: float, hk_targets=None) -> dict[str, tuple]:
+    # 返回 {target: (kind, name, inputs)}；inputs 为 (报价, 分红, 基准)，None 表示本轮无数据
+    out = {}
+
+    code = A_SHARE_CONFIG["CODE"]
+    price, ttm_div, us_rate = strategy_a_share.get_data(ttl)
+    out[f"a_share:{code}"] = ("a_share", code, None if price is None else (price, ttm_div, us_rate))
+
+    hk_targets = HK_SHARE_TARGETS if hk_targets is None else hk_targets
+    try:
+        us_rate = market_data.get_us_rate(ttl)
+    except Exception as e:
+        log(f"美债基准抓取失败: {e}")
+        us_rate = None
+    table = strategy_hk_us.get_metrics(hk_targets, ttl)
+    for code, name, price, net_div, error in zip(
+        table["code"], table["name"], table["price"], table["net_div"], table["error"]
+    ):
+        ok = error is None and us_rate is not None
+        out[f"hk_share:{code}"] = ("hk_share", name, (price, net_div, us_rate) if ok else None)
+    return out
+
+
+class Watcher:
+    def __init__(self, interval: float, hk_targets=None):
+        self.ttl = interval / 2
+        self.hk_targets = hk_targets
+        # target -> (inputs, signal)
+        self.state: dict[str, tuple] = {}
+        self.index = TriggerIndex()
+
+    @profiling.timed("watch.poll")
+    def poll(self) -> tuple[list[dict], dict]:
+        inputs = collect_inputs(self.ttl, self.hk_targets)
+        events = []
+        stats = {"targets": len(inputs), "recomputed": 0, "rebuilt": 0, "missing": 0}
+
+        for target, (kind, name, args) in inputs.items():
+            if args is None:
+                stats["missing"] += 1
+                continue
+            prev = self.state.get(target)
+            if prev is not None and prev[0] == args:
+                continue
+
+            price, div, base = args
+            stats["rebuilt"] += self.index.update(target, div, base, THRESHOLDS[kind])
+            signal = self.index.classify(target, price)
+            stats["recomputed"] += 1
+            if prev is not None and prev[1] != signal:
+                m = EVALUATORS[kind](price, div, base, name)["metrics"]
+                events.append(
+                    {
+                        "time": datetime.now().isoformat(timespec="seconds"),
+                        "target": target,
+                        "name": name,
+                        "from": prev[1],
+                        "to": signal,
+                        "direction": "up" if SIGNAL_CODES[signal] > SIGNAL_CODES[prev[1]] else "down",
+                        "price": m["price"],
+                        "spread": m["spread"],
+                    }
+                )
+            self.state[target] = (args, signal)
+
+        return events, stats
+
+
+def emit(event: dict, events_file: str | None = None):
+    arrow = "⬆️" if event["direction"] == "up" else "⬇️"
+    log(
+        f"{arrow} {event['name']} ({event['target']}): {event['from']} -> {event['to']}"
+        f" | 价格: {event['price']:.3f} | 利差: {event['spread']:+.2f}%"
+    )
+    if events_file:
+        with open(events_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def journal_rows(watcher: Watcher, events: list[dict], initial: bool) -> list[dict]:
+    # 首轮记录全部标的的初始信号，之后只记录跨档事件；target 去掉 "a_share:" / "hk_share:" 前缀，与各策略一致
+    rows = []
+    if initial:
+        for target, (args, signal) in watcher.state.items():
+            kind, code = target.split(":", 1)
+            m = EVALUATORS[kind](*args, code)["metrics"]
+            rows.append(journal.row(kind, code, {"signal": signal, "metrics": m}))
+    for event in events:
+        kind, code = event["target"].split(":", 1)
+        rows.append(
+            {
+                "kind": kind,
+                "target": code,
+                "signal": event["to"],
+                "spread": event["spread"],
+                "price": event["price"],
+                "metrics": event,
+                "plan": None,
+            }
+        )
+    return rows
+
+
+def run(interval: float, iterations: int = 0, events_file: str | None = None):
+    watcher = Watcher(interval)
+    log(f"开始监控：每 {interval:g}s 轮询一次（Ctrl+C 退出）")
+
+    n = 0
+    next_at = time.monotonic()
+    try:
+        while True:
+            started = time.monotonic()
+            events, stats = watcher.poll()
+            n += 1
+
+            if n == 1:
+                for target, (_, signal) in watcher.state.items():
+                    log(f"初始信号 {target}: {signal}")
+            for event in events:
+                emit(event, events_file)
+            journal.record("watch", journal_rows(watcher, events, initial=n == 1))
+            if stats["recomputed"] or stats["missing"]:
+                log(
+                    f"第 {n} 轮: 重算 {stats['recomputed']}/{stats['targets']}"
+                    f" | 重建触发价 {stats['rebuilt']}"
+                    f" | 无数据 {stats['missing']} | 事件 {len(events)}"
+                    f" | 耗时 {time.monotonic() - started:.2f}s"
+                )
+
+            if iterations and n >= iterations:
+                break
+            # 固定节拍：抓取耗时不会让轮询间隔逐渐漂移
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+    except KeyboardInterrupt:
+        log("已停止监控。")
+    return watcher
+
+
+def main():
+    cfg = WATCH_CONFIG
+    parser = argparse.ArgumentParser(description="常驻监控：信号跨档时输出事件")
+    parser.add_argument("--interval", type=float, default=cfg["INTERVAL_SECONDS"], help="轮询间隔（秒）")
+    parser.add_argument("--iterations", type=int, default=0, help="轮询次数，0 表示一直运行")
+    parser.add_argument("--events", default=cfg["EVENTS_FILE"], help="事件追加写入的 JSONL 文件")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    with profiling.session(args, "watch"):
+        if args.interval <= 0:
+            parser.error("--interval 必须大于 0")
+        run(args.interval, args.iterations, args.events)
+
+
+if __name__ == "__main__":
+    main()